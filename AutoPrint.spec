@@ -19,6 +19,7 @@ a = Analysis(
         'pystray._win32',
         'PIL._tkinter_finder',
         'PIL.ImageTk',
+        'orjson',
     ],
     hookspath=[],
     hooksconfig={},
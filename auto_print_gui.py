@@ -7,31 +7,60 @@ Aplicacion de bandeja del sistema para imprimir PDFs automaticamente.
 import os
 import sys
 import time
+import ctypes
 import json
+import re
 import shutil
+import glob
+import errno
+import hashlib
 import queue as _queue
 import threading
+import collections
+import heapq
+import itertools
+import atexit
+import importlib
+import random
 import winreg
-import win32print
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import date, datetime
+from datetime import date, datetime, timedelta, time as dt_time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 import pystray
-from PIL import Image, ImageDraw, ImageTk
+from PIL import Image, ImageDraw
+# win32print, watchdog.observers.polling y PIL.ImageTk se importan donde se
+# usan; run() los precarga en segundo plano (_preload_modules)
+
+try:
+    import orjson   # opcional: serializacion JSON en C, mucho mas rapida
+except ImportError:
+    orjson = None
 
 # ===== CONSTANTES =====
 APP_NAME     = "AutoPrint"
 APP_VERSION  = "1.2"
+WINDOW_TITLE = f"{APP_NAME} v{APP_VERSION} — Impresion automatica de PDFs"
 CONFIG_DIR   = Path(os.environ.get("APPDATA", Path.home())) / "AutoPrint"
 CONFIG_FILE  = CONFIG_DIR / "config.json"
 HISTORY_FILE = CONFIG_DIR / "history.log"
 PENDING_FILE  = CONFIG_DIR / "pending.json"
 LASTSEEN_FILE = CONFIG_DIR / "last_seen.json"  # {folder: iso_ts} ultima vez activo por carpeta
+PATHS_FILE    = CONFIG_DIR / "paths_cache.json"  # rutas de Acrobat/Sumatra/Drive ya resueltas
+LOCK_FILE     = CONFIG_DIR / ".lock"             # abierto en exclusiva mientras corre la app
 STARTUP_KEY   = r"SOFTWARE\Microsoft\Windows\CurrentVersion\Run"
+# Ruta absoluta del script, resuelta al importar (antes de cualquier chdir)
+_THIS_PATH    = os.path.abspath(__file__)
+# Con pythonw.exe o un ejecutable sin consola no hay stdout al que escribir
+_HAS_STDOUT   = sys.stdout is not None
+
+# Carpetas (dentro del perfil del usuario) donde suelen montarse Drive y OneDrive
+_GDRIVE_CANDIDATES   = ("Google Drive", "Mi unidad", "My Drive")
+_ONEDRIVE_CANDIDATES = ("OneDrive", "OneDrive - Personal")
 
 # Paleta de colores
 C_BG      = "#1a1a2e"
@@ -46,6 +75,377 @@ C_MUTED   = "#94a3b8"
 C_INPUT   = "#1e2a45"
 C_BORDER  = "#2d3748"
 
+# Fuentes compartidas (una sola tupla por estilo en vez de un literal por widget)
+FONT_TINY         = ("Segoe UI", 7)
+FONT_TINY_BOLD    = ("Segoe UI", 7, "bold")
+FONT_SMALL        = ("Segoe UI", 8)
+FONT_SMALL_BOLD   = ("Segoe UI", 8, "bold")
+FONT_BODY         = ("Segoe UI", 9)
+FONT_BODY_BOLD    = ("Segoe UI", 9, "bold")
+FONT_NORMAL       = ("Segoe UI", 10)
+FONT_NORMAL_BOLD  = ("Segoe UI", 10, "bold")
+FONT_LARGE        = ("Segoe UI", 11)
+FONT_LARGE_BOLD   = ("Segoe UI", 11, "bold")
+FONT_MONO         = ("Consolas", 9)
+
+
+# ===== LECTURA / ESCRITURA JSON =====
+
+def _read_json(path):
+    if orjson:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_json(path, obj, pretty=True):
+    """Escritura atomica: se serializa a un .tmp y se renombra sobre el destino,
+    asi un corte a mitad de escritura nunca deja el archivo truncado.
+    pretty=False escribe compacto (archivos internos que nadie edita a mano)."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    if orjson:
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0))
+    else:
+        with open(tmp, "w", encoding="utf-8") as f:
+            if pretty:
+                json.dump(obj, f, indent=2, ensure_ascii=False)
+            else:
+                # Sin indent json usa el codificador en C; sin espacios, archivo minimo
+                json.dump(obj, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+# ===== HILOS DE FONDO =====
+
+_THREAD_PRIORITY_BELOW_NORMAL = -1
+
+
+def _lower_thread_priority():
+    """Baja la prioridad del hilo actual: los hilos de fondo (bandeja, horario,
+    escaneo) pasan casi todo el tiempo esperando y no deben competir con Tk."""
+    try:
+        k32 = ctypes.windll.kernel32
+        k32.SetThreadPriority(k32.GetCurrentThread(), _THREAD_PRIORITY_BELOW_NORMAL)
+    except Exception:
+        pass
+
+
+_PRELOAD_MODULES = ("win32print", "PIL.ImageTk", "watchdog.observers.polling")
+
+
+def _preload_modules(names=_PRELOAD_MODULES):
+    """Importa en segundo plano modulos que solo se usan mas tarde, para que
+    su carga (.pyd, .py) se solape con la creacion del tray y de Tk."""
+    _lower_thread_priority()
+    for name in names:
+        try:
+            importlib.import_module(name)
+        except Exception:
+            pass
+
+
+# ===== EXISTENCIA DE RUTAS =====
+
+_INVALID_FILE_ATTRIBUTES = 0xFFFFFFFF
+
+
+def _exists_fast(p):
+    """Como os.path.exists pero sin stat(): GetFileAttributesW en Windows,
+    access(F_OK) en el resto."""
+    try:
+        attrs = ctypes.windll.kernel32.GetFileAttributesW(str(p))
+    except AttributeError:
+        return os.access(p, os.F_OK)
+    return (attrs & 0xFFFFFFFF) != _INVALID_FILE_ATTRIBUTES
+
+
+_FILE_ATTRIBUTE_DIRECTORY = 0x10
+
+
+def _isdir_fast(p):
+    """Como os.path.isdir con una sola GetFileAttributesW: stat() en Windows
+    abre un handle al archivo, aqui solo se leen los atributos."""
+    try:
+        attrs = ctypes.windll.kernel32.GetFileAttributesW(str(p)) & 0xFFFFFFFF
+    except AttributeError:
+        return os.path.isdir(p)
+    return attrs != _INVALID_FILE_ATTRIBUTES and bool(attrs & _FILE_ATTRIBUTE_DIRECTORY)
+
+
+_DRIVE_FIXED = 3
+
+
+def _is_fixed_drive(folder):
+    """True si `folder` esta en un disco local (DRIVE_FIXED). Unidades de red,
+    UNC y extraibles no entregan bien ReadDirectoryChangesW."""
+    root = os.path.splitdrive(os.path.abspath(folder))[0]
+    if not root:
+        return True
+    try:
+        return ctypes.windll.kernel32.GetDriveTypeW(root + "\\") == _DRIVE_FIXED
+    except AttributeError:
+        return True
+
+
+def _existing_dirs(paths):
+    """
+    Subconjunto de `paths` que son carpetas existentes. Las rutas que
+    comparten carpeta padre (varias reglas bajo la misma raiz de Drive) se
+    resuelven con un solo scandir del padre en vez de un stat por ruta.
+    """
+    by_parent = collections.defaultdict(list)
+    for p in set(paths):
+        parent, name = os.path.split(os.path.normpath(p))
+        by_parent[parent if name else None].append((p, name))
+
+    found = set()
+    for parent, items in by_parent.items():
+        if parent is None or len(items) == 1:
+            found.update(p for p, _ in items if os.path.isdir(p))
+            continue
+        try:
+            with os.scandir(parent) as it:
+                names = {os.path.normcase(e.name) for e in it if e.is_dir()}
+        except OSError:
+            continue
+        found.update(p for p, name in items if os.path.normcase(name) in names)
+    return found
+
+
+# Prefijos de temporales/bloqueos (Office, LibreOffice, Acrobat) que pueden
+# terminar en .pdf pero nunca son un documento a imprimir
+_TEMP_PREFIXES = ("~$", ".~lock.", "~WRL")
+
+
+def _is_printable_name(name):
+    """PDF por extension y no temporal; sin stat, solo el nombre."""
+    return name[-4:].lower() == ".pdf" and not name.startswith(_TEMP_PREFIXES)
+
+
+def _pdf_listdir(path):
+    """listdir para el PollingObserver: solo las entradas que podrian ser un
+    PDF a imprimir, asi cada sondeo hace stat() de esas y no de toda la carpeta."""
+    with os.scandir(path) as it:
+        return [e for e in it if _is_printable_name(e.name)]
+
+
+def _collect_new(folder, last_ts):
+    """
+    PDFs de `folder` con mtime > last_ts, como tuplas (mtime, name, path)
+    ordenadas por fecha. Un solo recorrido con scandir y un stat por entrada.
+    Los vacios (sincronizacion a medias) se omiten.
+    """
+    out    = []
+    append = out.append
+    with os.scandir(folder) as it:
+        for e in it:
+            n = e.name
+            if not _is_printable_name(n):
+                continue
+            try:
+                if not e.is_file(follow_symlinks=False):
+                    continue
+                st = e.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if st.st_mtime > last_ts and st.st_size > 0:
+                append((st.st_mtime, n, e.path))
+    out.sort()
+    return out
+
+
+_FP_HEAD = 64 * 1024   # bytes del inicio que entran en la huella
+
+
+def _fingerprint(path):
+    """
+    (tamano, mtime_ns, blake2b de los primeros 64 KiB): identifica el mismo
+    contenido aunque cambie el nombre (Drive y algunos programas escriben
+    con un nombre y renombran al terminar).
+    """
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        head = f.read(_FP_HEAD)
+    return st.st_size, st.st_mtime_ns, hashlib.blake2b(head, digest_size=16).digest()
+
+
+# ===== COPIA DE ARCHIVOS =====
+
+_GENERIC_READ          = 0x80000000
+_GENERIC_WRITE         = 0x40000000
+_CREATE_ALWAYS         = 2
+_OPEN_EXISTING         = 3
+_FILE_SHARE_READ       = 0x01
+_FILE_ATTRIBUTE_HIDDEN = 0x02
+_FILE_FLAG_DELETE_ON_CLOSE = 0x04000000
+_ERROR_SHARING_VIOLATION   = 32
+_ERROR_LOCK_VIOLATION      = 33
+_ERROR_NOT_SAME_DEVICE     = 17
+_INVALID_HANDLE_VALUE  = ctypes.c_void_p(-1).value
+
+# kernel32 propio con use_last_error: con el windll compartido GetLastError()
+# puede devolver el error de otra llamada. Los tipos se declaran una sola vez
+try:
+    _k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    _k32.CreateFileW.argtypes = [ctypes.c_wchar_p, ctypes.c_uint32, ctypes.c_uint32,
+                                 ctypes.c_void_p, ctypes.c_uint32, ctypes.c_uint32,
+                                 ctypes.c_void_p]
+    _k32.CreateFileW.restype  = ctypes.c_void_p
+    _k32.CloseHandle.argtypes = [ctypes.c_void_p]
+    _k32.CloseHandle.restype  = ctypes.c_int
+except (AttributeError, OSError):
+    _k32 = None
+
+
+def _is_file_free(path, share=0):
+    """
+    True si nadie mas tiene el archivo abierto (apertura sin compartir).
+    Con share=_FILE_SHARE_READ solo cuenta un escritor: la prueba no bloquea
+    a otros lectores ni a un escritor que vuelva a abrir el archivo.
+    Solo una violacion de comparticion o de bloqueo cuenta como ocupado: si
+    el archivo ya no existe no hay nada que esperar.
+    """
+    if _k32 is None:
+        try:
+            os.close(os.open(path, os.O_RDONLY))
+            return True
+        except OSError:
+            return False
+    h = _k32.CreateFileW(str(path), _GENERIC_READ, share, None, _OPEN_EXISTING, 0, None)
+    if h is None or h == _INVALID_HANDLE_VALUE:
+        return ctypes.get_last_error() not in (_ERROR_SHARING_VIOLATION, _ERROR_LOCK_VIOLATION)
+    _k32.CloseHandle(h)
+    return True
+
+
+def _wait_until_free(path, timeout=15.0, interval=0.1, max_interval=1.0):
+    """
+    Espera a que el lector / Drive suelte el archivo, como mucho `timeout` s.
+    El intervalo entre sondeos crece (x1.5 hasta max_interval): los PDFs
+    pequenos se liberan en menos de un segundo y los grandes no se sondean
+    en bucle apretado.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if _is_file_free(path):
+            return True
+        left = deadline - time.monotonic()
+        if left <= 0:
+            return False
+        time.sleep(min(interval, left))
+        interval = min(max_interval, interval * 1.5)
+
+
+_rng = random.SystemRandom()
+
+
+def _backoff_sleep(attempt, base=0.5, cap=30.0, jitter=0.3):
+    """Espera exponencial con jitter entre reintentos (attempt empieza en 1):
+    los bloqueos breves de Drive se resuelven con esperas cortas y varios
+    archivados a la vez no reintentan todos en el mismo instante."""
+    delay = min(cap, base * (2 ** (attempt - 1)))
+    time.sleep(delay * _rng.uniform(1 - jitter, 1 + jitter))
+
+
+def _copy_file(src, dst):
+    """
+    Copia src -> dst con CopyFileExW: el kernel copia datos, fechas y atributos
+    sin pasar por buffers de Python y ctypes suelta el GIL durante la llamada,
+    asi Tk y watchdog siguen respondiendo durante copias grandes desde Drive.
+    En ReFS / Dev Drive, Windows resuelve CopyFileExW con clonado de bloques.
+    Si la API no esta disponible se recurre a shutil.copy2.
+    """
+    try:
+        copy_ex = ctypes.windll.kernel32.CopyFileExW
+    except AttributeError:
+        shutil.copy2(str(src), str(dst))
+        return
+    cancel = ctypes.c_int(0)
+    if not copy_ex(str(src), str(dst), None, None, ctypes.byref(cancel), 0):
+        raise ctypes.WinError()
+
+
+def _move_or_copy(src, dst):
+    """
+    Si src y dst estan en el mismo volumen los mueve con un rename (solo
+    metadatos, sin leer el archivo) y devuelve True. Si no, copia con
+    _copy_file y devuelve False: el llamador borra despues el original.
+    """
+    s, d = str(src), str(dst)
+    same_vol = (os.path.splitdrive(os.path.abspath(s))[0].lower()
+                == os.path.splitdrive(os.path.abspath(d))[0].lower())
+    if same_vol:
+        try:
+            os.replace(s, d)
+            return True
+        except OSError as e:
+            # Unidad montada en carpeta, junction...: otro volumen tras todo
+            if (e.errno != errno.EXDEV
+                    and getattr(e, "winerror", None) != _ERROR_NOT_SAME_DEVICE):
+                raise
+    _copy_file(src, dst)
+    return False
+
+
+def _archive_file(src_path, archive_folder, log):
+    """
+    Archiva un PDF ya impreso: espera a que nadie lo tenga abierto, lo mueve
+    (o copia y luego borra el original) a archive_folder con reintentos, y si
+    ya existe uno con ese nombre le agrega la fecha. Unica implementacion para
+    PDFHandler y _ArchiveHelper.
+    """
+    _wait_until_free(src_path)
+    folder       = Path(archive_folder)
+    src          = Path(src_path)
+    stem, suffix = os.path.splitext(src.name)
+    dest         = folder / src.name
+
+    if dest.exists():
+        ts   = time.strftime("%Y%m%d_%H%M%S")
+        dest = folder / f"{stem}_{ts}{suffix}"
+
+    copied = False
+    for intento in range(1, 7):
+        try:
+            if not src.exists():
+                return
+            if _move_or_copy(src, dest):
+                log(f"Movido al archivo: {dest.name}")
+                log(f"Archivado en: {folder}")
+                return
+            copied = True
+            break
+        except Exception as e:
+            log(f"Copiando... intento {intento}/6 ({e})")
+            if intento < 6:
+                _backoff_sleep(intento)
+
+    if not copied:
+        log(f"ERROR: No se pudo copiar '{src.name}' al archivo local")
+        return
+
+    log(f"Copiado a local: {dest.name}")
+
+    for intento in range(1, 11):
+        try:
+            src.unlink()
+            log(f"Eliminado del Drive: {src.name}")
+            log(f"Archivado en: {folder}")
+            return
+        except PermissionError:
+            pass
+        except FileNotFoundError:
+            log(f"Archivado en: {folder}")
+            return
+        except Exception as e:
+            log(f"ERROR eliminando del Drive (intento {intento}/10): {e}")
+        if intento < 10:
+            _backoff_sleep(intento)
+
+    log(f"AVISO: '{src.name}' copiado pero no eliminado del Drive.")
+
 
 # ===== CONFIGURACION PERSISTENTE =====
 
@@ -68,15 +468,32 @@ class Config:
         "schedule_enabled": False,
         "schedule_start":   "08:00",
         "schedule_end":     "18:00",
+        "raw_printers":     [],     # impresoras que aceptan PDF directo (sin Acrobat)
+        "watch_interval":   30,     # segundos entre sondeos en carpetas de red
     }
 
+    # Claves que cambian con mucha frecuencia (arrastre del widget, contadores):
+    # se agrupan y se guardan con un pequeno retraso en vez de a cada cambio.
+    _DEFERRED_KEYS = frozenset({"widget_x", "widget_y", "printed_today",
+                                "printed_total", "last_file"})
+    _SAVE_DELAY    = 0.5   # segundos
+
     def get(self, k, default=None):
         return self._data.get(k, self.DEFAULTS.get(k, default))
 
     def __init__(self):
-        self._data = dict(self.DEFAULTS)
+        # Las listas se copian: las reglas se modifican en el sitio y no deben
+        # compartir objeto con DEFAULTS
+        self._data       = {k: list(v) if isinstance(v, list) else v
+                            for k, v in self.DEFAULTS.items()}
+        self._save_lock  = threading.Lock()
+        self._save_timer = None
+        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
         self.load()
         self._check_daily_reset()
+        # El Timer diferido es daemon: si el proceso sale por otra via que
+        # _quit_app (excepcion, sys.exit) el ultimo cambio no se perderia
+        atexit.register(self.flush)
 
     def _check_daily_reset(self):
         today = date.today().isoformat()
@@ -88,8 +505,7 @@ class Config:
     def load(self):
         try:
             if CONFIG_FILE.exists():
-                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                data = _read_json(CONFIG_FILE)
                 self._data.update(data)
                 # Migracion v1.x -> v1.2: convertir carpeta/impresora unica a regla
                 if not self._data.get("rules"):
@@ -107,16 +523,84 @@ class Config:
             pass
 
     def save(self):
-        CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(self._data, f, indent=2, ensure_ascii=False)
+        with self._save_lock:
+            data = dict(self._data)
+            try:
+                _write_json(CONFIG_FILE, data)
+            except FileNotFoundError:
+                # La carpeta se borro con la app abierta: recrearla y reintentar
+                CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+                _write_json(CONFIG_FILE, data)
+
+    def _schedule_save(self):
+        with self._save_lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self._SAVE_DELAY, self._flush_save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _flush_save(self):
+        with self._save_lock:
+            self._save_timer = None
+        self.save()
+
+    def flush(self):
+        """Guarda ya cualquier cambio diferido (llamar antes de salir)."""
+        with self._save_lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+            self.save()
 
     def __getitem__(self, k):
         return self._data.get(k, self.DEFAULTS.get(k))
 
     def __setitem__(self, k, v):
+        # Mismo valor escalar (toggles y spinbox sin cambio): nada que guardar.
+        # Las listas se modifican en el sitio, asi que esas se guardan siempre
+        if not isinstance(v, (list, dict)) and self._data.get(k) == v:
+            return
         self._data[k] = v
-        self.save()
+        if k in self._DEFERRED_KEYS:
+            self._schedule_save()
+        else:
+            self.save()
+
+    def update(self, mapping):
+        """Varios cambios de una vez: como mucho una sola escritura a disco."""
+        mapping = {k: v for k, v in mapping.items()
+                   if isinstance(v, (list, dict)) or self._data.get(k) != v}
+        if not mapping:
+            return
+        self._data.update(mapping)
+        if self._DEFERRED_KEYS.issuperset(mapping):
+            self._schedule_save()
+        else:
+            self.save()
+
+
+# ===== TRABAJO PENDIENTE (entrada de pending.json) =====
+
+class PrintJob:
+    """Trabajo guardado fuera de horario, con atributos fijos en vez de un dict."""
+    __slots__ = ("path", "printer", "acrobat", "rule_name",
+                 "archive_enabled", "archive_folder", "detected_at")
+
+    def __init__(self, path="", printer="", acrobat=None, rule_name="",
+                 archive_enabled=False, archive_folder="", detected_at=""):
+        self.path            = path
+        self.printer         = printer
+        self.acrobat         = acrobat
+        self.rule_name       = rule_name
+        self.archive_enabled = archive_enabled
+        self.archive_folder  = archive_folder
+        self.detected_at     = detected_at
+
+    @classmethod
+    def from_dict(cls, d):
+        """Ignora claves desconocidas: pending.json puede venir de otra version."""
+        return cls(**{k: d[k] for k in cls.__slots__ if k in d})
 
 
 # ===== COLA DE IMPRESION (serializa jobs para evitar conflictos) =====
@@ -125,13 +609,27 @@ class PrintQueue:
     """
     Un solo hilo worker procesa los trabajos de impresion de uno en uno.
     Evita que dos Acrobats arranquen simultaneamente contra la misma impresora.
+    Si SumatraPDF esta instalado se usa en su lugar: imprime en silencio y sale
+    en cuanto el trabajo llega al spooler, sin el arranque en frio de Acrobat.
+    Las impresoras marcadas como "PDF directo" reciben el archivo tal cual por
+    el spooler (RAW), sin lanzar ningun lector.
+    Con Sumatra, los trabajos seguidos para la misma impresora que ya esperan
+    en la cola se imprimen con un solo proceso (hasta _SUMATRA_BATCH PDFs).
     """
     _ACROBAT_TIMEOUT = 45   # segundos max esperando que Acrobat cierre
     _GAP_BETWEEN     = 2    # segundos de pausa entre trabajos consecutivos
-
-    def __init__(self, log_fn):
-        self._q        = _queue.Queue()
+    _RAW_CHUNK       = 64 * 1024
+    _SUMATRA_BATCH   = 8    # PDFs max por invocacion de SumatraPDF
+
+    def __init__(self, log_fn, sumatra_path=None, raw_printers_fn=None, on_idle=None):
+        # Productores (watchdog, escaneo, pendientes) -> un solo consumidor:
+        # basta un deque protegido por una Condition
+        self._dq       = collections.deque()
+        self._cv       = threading.Condition()
         self._log      = log_fn
+        self._sumatra  = sumatra_path
+        self._raw_fn   = raw_printers_fn   # () -> nombres de impresoras que aceptan PDF directo
+        self._on_idle  = on_idle           # () -> None, al vaciarse la cola tras un trabajo
         self._running  = True
         self._thread   = threading.Thread(target=self._run, daemon=True,
                                           name="PrintQueueWorker")
@@ -139,71 +637,316 @@ class PrintQueue:
 
     @property
     def pending(self):
-        return self._q.qsize()
+        return len(self._dq)
 
     def submit(self, job: dict):
         """
         job = {
             "acrobat":  str,          # ruta a Acrobat.exe
             "path":     str,          # PDF a imprimir
+            "name":     str,          # nombre del archivo (opcional, evita re-parsear path)
             "printer":  str,          # nombre de impresora
             "on_done":  callable,     # fn(status:str) -> None
         }
         """
-        self._q.put(job)
+        with self._cv:
+            self._dq.append(job)
+            self._cv.notify()
+
+    def stop(self):
+        """Detiene el worker despertando al hilo que espera en la Condition."""
+        with self._cv:
+            self._running = False
+            self._cv.notify()
 
     def _run(self):
         last_finished = 0.0
-        while self._running:
-            try:
-                job = self._q.get(timeout=1)
-            except _queue.Empty:
-                continue
+        while True:
+            with self._cv:
+                while not self._dq and self._running:
+                    self._cv.wait()
+                if not self._running:
+                    return
+                job   = self._dq.popleft()
+                raw   = bool(self._raw_fn) and job["printer"] in self._raw_fn()
+                batch = [job]
+                if self._sumatra and not raw:
+                    # Solo lo que ya espera: no se retrasa el primero
+                    dq = self._dq
+                    while (dq and len(batch) < self._SUMATRA_BATCH
+                           and dq[0]["printer"] == job["printer"]):
+                        batch.append(dq.popleft())
 
             # Pausa minima entre trabajos consecutivos
             gap = self._GAP_BETWEEN - (time.time() - last_finished)
             if gap > 0:
                 time.sleep(gap)
 
-            name    = Path(job["path"]).name
-            pending = self._q.qsize()
+            pending = len(self._dq)
             extra   = f"  ({pending} en cola)" if pending else ""
-            self._log(f"[Cola] Imprimiendo: {name} -> {job['printer']}{extra}")
+            for j in batch:
+                name = j.get("name") or os.path.basename(j["path"])
+                self._log(f"[Cola] Imprimiendo: {name} -> {j['printer']}{extra}")
 
             status = "OK"
             try:
-                proc = subprocess.Popen(
-                    [job["acrobat"], "/t", job["path"], job["printer"]]
-                )
-                try:
-                    proc.wait(timeout=self._ACROBAT_TIMEOUT)
-                except subprocess.TimeoutExpired:
-                    proc.kill()
-                    self._log(f"[Cola] AVISO: Acrobat cerrado por timeout — "
-                              f"trabajo ya enviado al spooler")
+                if raw:
+                    self._print_raw(job)
+                elif self._sumatra:
+                    self._print_sumatra(batch)
+                else:
+                    self._print_acrobat(job)
             except Exception as e:
                 status = f"ERROR: {e}"
                 self._log(f"[Cola] ERROR: {e}")
 
             last_finished = time.time()
 
-            if job.get("on_done"):
+            for j in batch:
+                if j.get("on_done"):
+                    try:
+                        j["on_done"](status)
+                    except Exception:
+                        pass
+
+            if self._on_idle and not self._dq:
                 try:
-                    job["on_done"](status)
+                    self._on_idle()
                 except Exception:
                     pass
 
-            self._q.task_done()
+    def _wait_engine(self, proc, engine, timeout):
+        """
+        Misma regla para ambos motores: si el proceso no termina a tiempo se
+        cierra y el trabajo cuenta como enviado (ya suele estar en el spooler),
+        en vez de marcarlo como error y dejar el PDF sin archivar.
+        Devuelve el codigo de salida, o None si hubo timeout.
+        """
+        try:
+            return proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            self._log(f"[Cola] AVISO: {engine} cerrado por timeout — "
+                      f"trabajo ya enviado al spooler")
+            return None
+
+    def _print_acrobat(self, job):
+        proc = subprocess.Popen(
+            [job["acrobat"], "/t", job["path"], job["printer"]]
+        )
+        self._wait_engine(proc, "Acrobat", self._ACROBAT_TIMEOUT)
+
+    def _print_sumatra(self, jobs):
+        """Imprime uno o varios PDFs (misma impresora) con un solo SumatraPDF."""
+        proc = subprocess.Popen(
+            [self._sumatra, "-print-to", jobs[0]["printer"],
+             "-silent", "-exit-when-done", *(j["path"] for j in jobs)]
+        )
+        code = self._wait_engine(proc, "SumatraPDF", self._ACROBAT_TIMEOUT * len(jobs))
+        if code:
+            raise RuntimeError(f"SumatraPDF termino con codigo {code}")
+
+    def _print_raw(self, job):
+        """Envia el PDF sin procesar al spooler (impresoras con PDF directo)."""
+        import win32print
+        h = win32print.OpenPrinter(job["printer"])
+        try:
+            win32print.StartDocPrinter(h, 1, (os.path.basename(job["path"]), None, "RAW"))
+            try:
+                win32print.StartPagePrinter(h)
+                with open(job["path"], "rb") as f:
+                    while True:
+                        chunk = f.read(self._RAW_CHUNK)
+                        if not chunk:
+                            break
+                        win32print.WritePrinter(h, chunk)
+                win32print.EndPagePrinter(h)
+            finally:
+                win32print.EndDocPrinter(h)
+        finally:
+            win32print.ClosePrinter(h)
+
+
+# ===== DESPACHADOR DE ESPERA (deja "asentarse" cada PDF antes de imprimirlo) =====
+
+class SettleDispatcher:
+    """
+    Ejecuta callbacks tras un retraso sin bloquear al hilo de watchdog.
+    Cada PDF detectado se reprograma hasta que deja de cambiar (como mucho
+    wait_seconds); un unico hilo duerme hasta el vencimiento mas proximo, asi
+    varios PDFs que llegan juntos esperan en paralelo en vez de uno tras otro.
+    """
+    _MAX_PENDING = 1024   # limite de entradas en espera (sobrecarga -> se descartan)
+
+    def __init__(self, log_fn):
+        self._heap    = []
+        self._seq     = itertools.count()   # desempate FIFO con el mismo vencimiento
+        self._cv      = threading.Condition()
+        self._log     = log_fn
+        self._running = True
+        self._thread  = threading.Thread(target=self._run, daemon=True,
+                                         name="SettleDispatcher")
+        self._thread.start()
+
+    def submit(self, delay, fn, *args):
+        with self._cv:
+            if len(self._heap) >= self._MAX_PENDING:
+                self._log("AVISO: demasiados PDFs en espera, evento descartado")
+                return False
+            heapq.heappush(self._heap,
+                           (time.monotonic() + delay, next(self._seq), fn, args))
+            self._cv.notify()
+        return True
+
+    def stop(self):
+        with self._cv:
+            self._running = False
+            self._cv.notify()
+
+    def _run(self):
+        while True:
+            with self._cv:
+                while True:
+                    if not self._running:
+                        return
+                    if not self._heap:
+                        self._cv.wait()
+                        continue
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cv.wait(wait)
+                _, _, fn, args = heapq.heappop(self._heap)
+            try:
+                fn(*args)
+            except Exception as e:
+                self._log(f"ERROR: {e}")
+
+
+# ===== COLA DE ARCHIVADO (copia + borrado tras imprimir) =====
+
+class ArchiveQueue:
+    """
+    Hilos persistentes que ejecutan los traslados al archivo local.
+    Sustituye al hilo nuevo por cada PDF impreso; con dos workers una copia
+    lenta desde la red no retrasa a todas las siguientes. Los hilos son daemon:
+    una tarea lenta en Drive/SMB no retiene la salida del interprete. Tambien
+    sirve (con un worker) para vaciar pendientes en serie.
+    """
+    def __init__(self, log_fn, workers=2, name="ArchiveWorker",
+                 error_msg="ERROR archivando"):
+        self._q         = _queue.Queue()
+        self._log       = log_fn
+        self._error_msg = error_msg
+        self._threads   = []
+        for i in range(workers):
+            t = threading.Thread(target=self._run, daemon=True,
+                                 name=f"{name}-{i + 1}")
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, fn, *args, **kwargs):
+        self._q.put((fn, args, kwargs))
+
+    def stop(self):
+        for _ in self._threads:
+            self._q.put(None)
+
+    def _run(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            fn, args, kwargs = item
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                self._log(f"{self._error_msg}: {e}")
+
+
+# ===== HISTORIAL (escritura agrupada en segundo plano) =====
+
+class HistoryWriter:
+    """
+    Acumula las lineas del historial en memoria y un hilo las escribe de una
+    vez cada segundo (o antes si se juntan muchas), en lugar de abrir y cerrar
+    history.log por cada impresion. El recorte del archivo tambien se hace aqui.
+    """
+    _FLUSH_EVERY  = 1.0          # segundos
+    _FLUSH_LINES  = 32           # o antes si se acumulan tantas lineas
+    _ROTATE_BYTES = 1024 * 1024  # a partir de este tamano se recorta...
+    _KEEP_LINES   = 10000        # ...conservando las ultimas N lineas
+
+    def __init__(self, path):
+        self._path   = path
+        self._buf    = collections.deque()
+        self._cv     = threading.Condition()
+        self._io     = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="HistoryWriter")
+        self._thread.start()
+
+    def write(self, line):
+        with self._cv:
+            self._buf.append(line)
+            n = len(self._buf)
+            # 1: despierta al hilo dormido sin plazo; _FLUSH_LINES: escribir ya
+            if n == 1 or n >= self._FLUSH_LINES:
+                self._cv.notify()
+
+    def flush(self):
+        """Escribe ya lo pendiente (antes de leer el historial o al salir)."""
+        with self._cv:
+            lines = list(self._buf)
+            self._buf.clear()
+        if lines:
+            self._write_lines(lines)
+
+    def _run(self):
+        while True:
+            with self._cv:
+                # Sin nada pendiente duerme sin timeout (sin despertares en
+                # reposo); con lineas, espera hasta _FLUSH_EVERY para agruparlas
+                while not self._buf:
+                    self._cv.wait()
+                if len(self._buf) < self._FLUSH_LINES:
+                    self._cv.wait(timeout=self._FLUSH_EVERY)
+            self.flush()
+
+    def _write_lines(self, lines):
+        with self._io:
+            try:
+                with open(self._path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                    size = f.tell()
+                if size > self._ROTATE_BYTES:
+                    self._rotate()
+            except Exception:
+                pass
+
+    def _rotate(self):
+        with open(self._path, "r", encoding="utf-8") as f:
+            keep = collections.deque(f, maxlen=self._KEEP_LINES)
+        tmp = self._path.with_suffix(self._path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(keep)
+        os.replace(tmp, self._path)
 
 
 # ===== MANEJADOR DE ARCHIVOS PDF =====
 
 class PDFHandler(FileSystemEventHandler):
+    _DEDUP_WINDOW = 10     # segundos en los que un mismo path se considera duplicado
+    _DEDUP_MAX    = 1024   # entradas maximas recordadas
+    _STABLE_FLOOR = 2.0    # segundos minimos desde la deteccion (o wait_seconds si es menor)
+    _STABLE_POLL  = 0.5    # segundos entre lecturas de tamano al esperar que termine la escritura
+
     def __init__(self, printer, acrobat_path, wait_seconds, log_fn,
                  archive_enabled=False, archive_folder="",
                  on_detected_fn=None, on_printed_fn=None,
                  rule_name="", print_queue=None,
-                 schedule_fn=None, on_pending_fn=None):
+                 schedule_fn=None, on_pending_fn=None, dispatcher=None,
+                 seen_fn=None, archive_queue=None):
         super().__init__()
         self.printer         = printer
         self.acrobat_path    = acrobat_path
@@ -211,58 +954,130 @@ class PDFHandler(FileSystemEventHandler):
         self.log_fn          = log_fn
         self.archive_enabled = archive_enabled
         self.archive_folder  = archive_folder
+        self._archive_path   = Path(archive_folder) if archive_enabled and archive_folder else None
         self.on_detected_fn  = on_detected_fn
         self.on_printed_fn   = on_printed_fn
         self.rule_name       = rule_name
         self.print_queue     = print_queue
         self.schedule_fn     = schedule_fn    # () -> bool: estamos dentro del horario?
         self.on_pending_fn   = on_pending_fn  # (job_dict) -> None: guardar para despues
-        self._printed        = set()
+        self.dispatcher      = dispatcher     # SettleDispatcher: espera sin bloquear watchdog
+        self.seen_fn         = seen_fn        # (path, printer) -> bool: ya lo envio otra regla?
+        self.archive_queue   = archive_queue  # ArchiveQueue compartida para mover al archivo
+        self._printed        = collections.OrderedDict()   # path -> monotonic
 
     def _log(self, msg):
         prefix = f"[{self.rule_name}] " if self.rule_name else ""
         self.log_fn(f"{prefix}{msg}")
 
+    def _is_duplicate(self, path):
+        """True si el path ya se proceso hace menos de _DEDUP_WINDOW segundos."""
+        now  = time.monotonic()
+        seen = self._printed.get(path)
+        if seen is not None and now - seen < self._DEDUP_WINDOW:
+            return True
+        self._printed[path] = now
+        self._printed.move_to_end(path)
+        if len(self._printed) > self._DEDUP_MAX:
+            self._printed.popitem(last=False)
+        return False
+
     def on_created(self, event):
         if event.is_directory:
             return
-        path = event.src_path
-        if not path.lower().endswith(".pdf"):
+        self._handle_pdf(event.src_path)
+
+    def on_moved(self, event):
+        # Algunas apps (y la sincronizacion de Drive) escriben a un temporal y
+        # lo renombran a .pdf: eso llega como "moved", nunca como "created"
+        if event.is_directory:
             return
+        self._handle_pdf(event.dest_path)
 
-        name = Path(path).name
+    def _handle_pdf(self, path):
+        # Solo la extension: evita copiar en minusculas el path completo por evento
+        if path[-4:].lower() != ".pdf":
+            return
+
+        name = os.path.basename(path)
+        if not _is_printable_name(name):
+            return
         self._log(f"PDF detectado: {name}")
         if self.on_detected_fn:
             self.on_detected_fn(name, self.rule_name)
 
-        time.sleep(self.wait_seconds)
+        if self.dispatcher:
+            deadline = time.monotonic() + self.wait_seconds
+            self.dispatcher.submit(self._STABLE_POLL, self._check_stable,
+                                   path, name, None, deadline)
+        else:
+            time.sleep(self.wait_seconds)
+            self._on_settled(path, name)
 
-        if path not in self._printed:
-            self._printed.add(path)   # marcar YA para evitar doble envio
+    def _check_stable(self, path, name, prev, deadline):
+        """
+        Corre en el SettleDispatcher cada _STABLE_POLL s: el PDF se da por
+        terminado cuando tamano y mtime no cambian entre dos lecturas, ya paso
+        el minimo _STABLE_FLOOR desde la deteccion y nadie lo tiene abierto;
+        o al cumplirse wait_seconds. Un archivo que se copia rapido no espera
+        los wait_seconds completos.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._log(f"Omitido (ya no existe): {name}")
+            return
+        cur = (st.st_size, st.st_mtime_ns)
+        now = time.monotonic()
+        # Escaneres a SMB y Drive pueden preasignar el archivo o pausar >0.5 s
+        # a mitad de escritura: ademas del stat estable, piso minimo y sin
+        # escritor con el archivo abierto. La prueba va al final (solo con el
+        # stat ya estable) y comparte lectura para no bloquear al escritor
+        floor = deadline - self.wait_seconds + min(self.wait_seconds, self._STABLE_FLOOR)
+        if (cur == prev and st.st_size > 0 and now >= floor
+                and _is_file_free(path, share=_FILE_SHARE_READ)):
+            self._on_settled(path, name)
+        elif now >= deadline:
+            if st.st_size == 0:
+                # Drive aun no bajo el contenido: imprimirlo solo daria error
+                self._log(f"Omitido (archivo vacio): {name}")
+                return
+            self._on_settled(path, name)
+        else:
+            self.dispatcher.submit(self._STABLE_POLL, self._check_stable,
+                                   path, name, cur, deadline)
 
-            # Verificar si estamos dentro del horario
-            in_schedule = self.schedule_fn() if self.schedule_fn else True
+    def _on_settled(self, path, name):
+        """Llamado cuando el PDF ya no cambia (o tras wait_seconds)."""
+        if self._is_duplicate(path):   # marca YA para evitar doble envio
+            return
+        if self.seen_fn and self.seen_fn(path, self.printer):
+            self._log(f"Omitido (ya enviado por otra regla): {name}")
+            return
 
-            if not in_schedule:
-                # Guardar para imprimir cuando inicie el horario
-                self._log(f"Fuera de horario — guardado para despues: {name}")
-                if self.on_pending_fn:
-                    self.on_pending_fn({
-                        "path":            path,
-                        "printer":         self.printer,
-                        "acrobat":         self.acrobat_path,
-                        "rule_name":       self.rule_name,
-                        "archive_enabled": self.archive_enabled,
-                        "archive_folder":  self.archive_folder,
-                        "detected_at":     datetime.now().isoformat(timespec="seconds"),
-                    })
-                return
+        # Verificar si estamos dentro del horario
+        in_schedule = self.schedule_fn() if self.schedule_fn else True
+
+        if not in_schedule:
+            # Guardar para imprimir cuando inicie el horario
+            self._log(f"Fuera de horario — guardado para despues: {name}")
+            if self.on_pending_fn:
+                self.on_pending_fn({
+                    "path":            path,
+                    "printer":         self.printer,
+                    "acrobat":         self.acrobat_path,
+                    "rule_name":       self.rule_name,
+                    "archive_enabled": self.archive_enabled,
+                    "archive_folder":  self.archive_folder,
+                    "detected_at":     datetime.now().isoformat(timespec="seconds"),
+                })
+            return
 
-            self._submit_to_queue(path, name)
+        self._submit_to_queue(path, name)
 
     def _submit_to_queue(self, path, name=None):
         if name is None:
-            name = Path(path).name
+            name = os.path.basename(path)
 
         pending = self.print_queue.pending if self.print_queue else 0
         if pending > 0:
@@ -276,10 +1091,13 @@ class PDFHandler(FileSystemEventHandler):
                 if self.on_printed_fn:
                     self.on_printed_fn(_name, self.printer, "OK", self.rule_name)
                 if self.archive_enabled and self.archive_folder:
-                    threading.Thread(
-                        target=self._move_to_archive,
-                        args=(_path,), daemon=True
-                    ).start()
+                    if self.archive_queue:
+                        self.archive_queue.submit(self._move_to_archive, _path)
+                    else:
+                        threading.Thread(
+                            target=self._move_to_archive,
+                            args=(_path,), daemon=True
+                        ).start()
             else:
                 self._log(f"ERROR al imprimir: {status}")
                 if self.on_printed_fn:
@@ -289,6 +1107,7 @@ class PDFHandler(FileSystemEventHandler):
             self.print_queue.submit({
                 "acrobat": self.acrobat_path,
                 "path":    path,
+                "name":    name,
                 "printer": self.printer,
                 "on_done": _on_done,
             })
@@ -300,67 +1119,86 @@ class PDFHandler(FileSystemEventHandler):
                 _on_done(f"ERROR: {e}")
 
     def _move_to_archive(self, src_path):
-        time.sleep(8)
-        src  = Path(src_path)
-        dest = Path(self.archive_folder) / src.name
+        _archive_file(src_path, self._archive_path, self._log)
 
-        if dest.exists():
-            ts   = time.strftime("%Y%m%d_%H%M%S")
-            dest = Path(self.archive_folder) / f"{src.stem}_{ts}{src.suffix}"
 
-        copied = False
-        for intento in range(1, 7):
-            try:
-                if not src.exists():
-                    return
-                shutil.copy2(str(src), str(dest))
-                copied = True
-                break
-            except Exception as e:
-                self._log(f"Copiando... intento {intento}/6 ({e})")
-                time.sleep(5)
+# ===== WIDGET FLOTANTE GLASSMORPHISM =====
 
-        if not copied:
-            self._log(f"ERROR: No se pudo copiar '{src.name}' al archivo local")
-            return
+class _ACCENT_POLICY(ctypes.Structure):
+    _fields_ = [
+        ("AccentState",   ctypes.c_uint),
+        ("AccentFlags",   ctypes.c_uint),
+        ("GradientColor", ctypes.c_uint),
+        ("AnimationId",   ctypes.c_uint),
+    ]
 
-        self._log(f"Copiado a local: {dest.name}")
 
-        for intento in range(1, 11):
-            try:
-                src.unlink()
-                self._log(f"Eliminado del Drive: {src.name}")
-                self._log(f"Archivado en: {self.archive_folder}")
-                return
-            except PermissionError:
-                time.sleep(6)
-            except FileNotFoundError:
-                self._log(f"Archivado en: {self.archive_folder}")
-                return
-            except Exception as e:
-                self._log(f"ERROR eliminando del Drive (intento {intento}/10): {e}")
-                time.sleep(6)
+class _WCAD(ctypes.Structure):
+    _fields_ = [
+        ("Attribute",  ctypes.c_uint),
+        ("Data",       ctypes.c_void_p),
+        ("SizeOfData", ctypes.c_size_t),
+    ]
 
-        self._log(f"AVISO: '{src.name}' copiado pero no eliminado del Drive.")
 
+_SWCA = None   # SetWindowCompositionAttribute con argtypes ya configurados
+
+
+def _set_window_composition(hwnd, data):
+    global _SWCA
+    if _SWCA is None:
+        fn          = ctypes.windll.user32.SetWindowCompositionAttribute
+        fn.argtypes = [ctypes.c_void_p, ctypes.POINTER(_WCAD)]
+        fn.restype  = ctypes.c_int
+        _SWCA       = fn
+    return _SWCA(hwnd, ctypes.byref(data))
+
+
+_WINEVENT = None   # (WINEVENTPROC, SetWinEventHook, UnhookWinEvent) con tipos configurados
+
+
+def _win_event_api():
+    """HWINEVENTHOOK es un handle: sin restype c_void_p ctypes lo trunca a int
+    en Python de 64 bits y UnhookWinEvent falla despues."""
+    global _WINEVENT
+    if _WINEVENT is None:
+        proto = ctypes.WINFUNCTYPE(None, ctypes.c_void_p, ctypes.c_uint,
+                                   ctypes.c_void_p, ctypes.c_long,
+                                   ctypes.c_long, ctypes.c_uint, ctypes.c_uint)
+        u32             = ctypes.windll.user32
+        hook            = u32.SetWinEventHook
+        hook.argtypes   = [ctypes.c_uint, ctypes.c_uint, ctypes.c_void_p, proto,
+                           ctypes.c_uint, ctypes.c_uint, ctypes.c_uint]
+        hook.restype    = ctypes.c_void_p
+        unhook          = u32.UnhookWinEvent
+        unhook.argtypes = [ctypes.c_void_p]
+        unhook.restype  = ctypes.c_int
+        _WINEVENT       = (proto, hook, unhook)
+    return _WINEVENT
 
-# ===== WIDGET FLOTANTE GLASSMORPHISM =====
 
 class FloatingWidget:
     """Widget de escritorio con efecto glassmorphism via DWM de Windows."""
 
     _TKEY = "#010203"   # color "llave" usado para transparencia
 
+    _EVENT_SYSTEM_FOREGROUND = 0x0003
+    _WINEVENT_OUTOFCONTEXT   = 0x0000
+
     def __init__(self, app):
         self.app     = app
         self.win     = None
         self._drag_x = 0
         self._drag_y = 0
+        self._hook    = None   # handle de SetWinEventHook
+        self._hook_cb = None   # referencia al callback (evita que el GC lo libere)
+        self._last    = {}     # ultimo valor escrito en cada label
 
     def show(self):
         if self.win and self.win.winfo_exists():
             self.win.deiconify()
             self._pin_to_desktop()
+            self._install_hook()
             return
 
         win = tk.Toplevel()
@@ -386,49 +1224,29 @@ class FloatingWidget:
         self._build(win)
 
         win.after(150, self._pin_to_desktop)
-        win.after(2000, self._keep_on_desktop)
+        win.after(150, self._install_hook)
 
     def _apply_glass(self):
         """Activa el efecto Acrylic/Blur de Windows 10/11 via DWM."""
-        import ctypes
-
-        class ACCENT_POLICY(ctypes.Structure):
-            _fields_ = [
-                ("AccentState",   ctypes.c_uint),
-                ("AccentFlags",   ctypes.c_uint),
-                ("GradientColor", ctypes.c_uint),
-                ("AnimationId",   ctypes.c_uint),
-            ]
-
-        class WCAD(ctypes.Structure):
-            _fields_ = [
-                ("Attribute",  ctypes.c_uint),
-                ("Data",       ctypes.c_void_p),
-                ("SizeOfData", ctypes.c_size_t),
-            ]
-
         try:
-            accent = ACCENT_POLICY()
+            accent = _ACCENT_POLICY()
             accent.AccentState   = 4            # ACCENT_ENABLE_ACRYLICBLURBEHIND
             accent.AccentFlags   = 2
             accent.GradientColor = 0x18101828   # azul oscuro, ~10% opacidad
 
-            data = WCAD()
+            data = _WCAD()
             data.Attribute  = 19                # WCA_ACCENT_POLICY
             data.Data       = ctypes.cast(ctypes.pointer(accent), ctypes.c_void_p)
             data.SizeOfData = ctypes.sizeof(accent)
 
             hwnd = int(self.win.wm_frame(), 16)
-            ctypes.windll.user32.SetWindowCompositionAttribute(
-                hwnd, ctypes.byref(data)
-            )
+            _set_window_composition(hwnd, data)
             self.win.wm_attributes("-transparentcolor", self._TKEY)
         except Exception:
             self.win.wm_attributes("-alpha", 0.80)
 
     def _pin_to_desktop(self):
         try:
-            import ctypes
             hwnd = int(self.win.wm_frame(), 16)
             ctypes.windll.user32.SetWindowPos(
                 hwnd, 1, 0, 0, 0, 0,
@@ -437,12 +1255,48 @@ class FloatingWidget:
         except Exception:
             pass
 
+    def _install_hook(self):
+        """
+        Re-fija el widget al fondo solo cuando cambia la ventana en primer
+        plano, en vez de sondear cada 2 s. El hook OUTOFCONTEXT se entrega por
+        la cola de mensajes del hilo de Tk, asi que el callback corre en ese hilo.
+        """
+        if self._hook:
+            return
+        try:
+            proto, set_hook, _ = _win_event_api()
+
+            def _on_event(hook, event, hwnd, id_obj, id_child, thread, ms):
+                if self.win and self.win.winfo_exists():
+                    self.win.after_idle(self._pin_to_desktop)
+
+            self._hook_cb = proto(_on_event)
+            self._hook = set_hook(
+                self._EVENT_SYSTEM_FOREGROUND, self._EVENT_SYSTEM_FOREGROUND,
+                None, self._hook_cb, 0, 0, self._WINEVENT_OUTOFCONTEXT)
+        except Exception:
+            self._hook = None
+        if not self._hook:
+            # Sin hook disponible: volver al sondeo periodico
+            self._hook_cb = None
+            self.win.after(2000, self._keep_on_desktop)
+
+    def _remove_hook(self):
+        if self._hook:
+            try:
+                _win_event_api()[2](self._hook)
+            except Exception:
+                pass
+        self._hook    = None
+        self._hook_cb = None
+
     def _keep_on_desktop(self):
         if self.win and self.win.winfo_exists() and self.win.winfo_viewable():
             self._pin_to_desktop()
             self.win.after(2000, self._keep_on_desktop)
 
     def hide(self):
+        self._remove_hook()
         if self.win and self.win.winfo_exists():
             self.win.withdraw()
         self.app.config["widget_visible"] = False
@@ -457,13 +1311,13 @@ class FloatingWidget:
         self._bind_drag(bar)
 
         lbl_title = tk.Label(bar, text="AutoPrint",
-                             font=("Segoe UI", 8, "bold"),
+                             font=FONT_SMALL_BOLD,
                              bg=_DRAG, fg="#cccccc")
         lbl_title.pack(side="left", padx=10)
         self._bind_drag(lbl_title)
 
         btn_close = tk.Button(bar, text="X",
-                              font=("Segoe UI", 8), bg=_DRAG, fg="#aaaaaa",
+                              font=FONT_SMALL, bg=_DRAG, fg="#aaaaaa",
                               activebackground=_DRAG, activeforeground="#ef4444",
                               relief="flat", cursor="hand2", bd=0,
                               command=self.hide)
@@ -471,7 +1325,7 @@ class FloatingWidget:
 
         # Estado
         self._lbl_status = tk.Label(win, text="Detenido",
-                                    font=("Segoe UI", 8, "bold"),
+                                    font=FONT_SMALL_BOLD,
                                     bg=G, fg=C_DANGER)
         self._lbl_status.pack(anchor="w", padx=14, pady=(4, 2))
 
@@ -487,7 +1341,7 @@ class FloatingWidget:
         self._lbl_hoy.pack()
         self._bind_drag(self._lbl_hoy)
         lbl_hoy_sub = tk.Label(col_hoy, text="HOY",
-                               font=("Segoe UI", 7, "bold"),
+                               font=FONT_TINY_BOLD,
                                bg=G, fg="#aaaaaa")
         lbl_hoy_sub.pack()
         self._bind_drag(lbl_hoy_sub)
@@ -503,7 +1357,7 @@ class FloatingWidget:
         self._lbl_total.pack()
         self._bind_drag(self._lbl_total)
         lbl_tot_sub = tk.Label(col_tot, text="TOTAL",
-                               font=("Segoe UI", 7, "bold"),
+                               font=FONT_TINY_BOLD,
                                bg=G, fg="#aaaaaa")
         lbl_tot_sub.pack()
         self._bind_drag(lbl_tot_sub)
@@ -511,11 +1365,12 @@ class FloatingWidget:
         tk.Frame(win, bg="#555555", height=1).pack(fill="x", padx=14, pady=(0, 4))
 
         self._lbl_last = tk.Label(win, text="Sin actividad",
-                                   font=("Segoe UI", 7),
+                                   font=FONT_TINY,
                                    bg=G, fg="#94a3b8",
                                    wraplength=240, justify="left")
         self._lbl_last.pack(anchor="w", padx=14, pady=(0, 8))
 
+        self._last = {}
         self.refresh()
 
     def _bind_drag(self, widget):
@@ -542,11 +1397,17 @@ class FloatingWidget:
         last  = self.app.config["last_file"] or "Sin actividad"
         st    = "Activo" if self.app.is_watching else "Detenido"
         c_st  = C_SUCCESS if self.app.is_watching else C_DANGER
+        # Solo tocar los labels cuyo valor cambio: cada config() es un viaje a Tcl
         try:
-            self._lbl_status.config(text=st, fg=c_st)
-            self._lbl_hoy.config(text=str(today))
-            self._lbl_total.config(text=str(total))
-            self._lbl_last.config(text=last)
+            for key, lbl, value, extra in (
+                ("status", self._lbl_status, st,         {"fg": c_st}),
+                ("hoy",    self._lbl_hoy,    str(today), {}),
+                ("total",  self._lbl_total,  str(total), {}),
+                ("file",   self._lbl_last,   last,       {}),
+            ):
+                if self._last.get(key) != value:
+                    lbl.config(text=value, **extra)
+                    self._last[key] = value
         except Exception:
             pass
 
@@ -593,7 +1454,7 @@ class RuleDialog:
         # Nombre
         self._field(win, "Nombre (opcional)")
         tk.Entry(win, textvariable=self._v_name,
-                 font=("Segoe UI", 10), bg=C_INPUT, fg=C_TEXT,
+                 font=FONT_NORMAL, bg=C_INPUT, fg=C_TEXT,
                  relief="flat", insertbackground=C_TEXT).pack(
             fill="x", **pad, ipady=6, pady=(0, 10))
 
@@ -602,20 +1463,20 @@ class RuleDialog:
         row_f = tk.Frame(win, bg=C_BG)
         row_f.pack(fill="x", **pad, pady=(0, 10))
         tk.Entry(row_f, textvariable=self._v_folder,
-                 font=("Segoe UI", 10), bg=C_INPUT, fg=C_TEXT,
+                 font=FONT_NORMAL, bg=C_INPUT, fg=C_TEXT,
                  relief="flat", insertbackground=C_TEXT).pack(
             side="left", fill="x", expand=True, ipady=6, padx=(0, 6))
         self._btn(row_f, "Examinar", self._browse_folder).pack(side="left", padx=(0, 4))
         if self.app.gdrive_path:
             tk.Button(row_f, text="Drive",
-                      font=("Segoe UI", 9, "bold"),
+                      font=FONT_BODY_BOLD,
                       bg="#1967d2", fg="white", relief="flat", cursor="hand2",
                       padx=8, pady=4,
                       command=lambda: self._v_folder.set(self.app.gdrive_path)
                       ).pack(side="left", padx=(0, 4))
         if self.app.onedrive_path:
             tk.Button(row_f, text="OneDrive",
-                      font=("Segoe UI", 9, "bold"),
+                      font=FONT_BODY_BOLD,
                       bg="#0078d4", fg="white", relief="flat", cursor="hand2",
                       padx=8, pady=4,
                       command=lambda: self._v_folder.set(self.app.onedrive_path)
@@ -628,7 +1489,7 @@ class RuleDialog:
         printers = self._get_printers()
         self._cb_printer = ttk.Combobox(row_p, textvariable=self._v_printer,
                                          values=printers, state="readonly",
-                                         font=("Segoe UI", 10))
+                                         font=FONT_NORMAL)
         self._cb_printer.pack(side="left", fill="x", expand=True)
         if not self._v_printer.get() and printers:
             self._v_printer.set(printers[0])
@@ -640,7 +1501,7 @@ class RuleDialog:
         tk.Checkbutton(chk_frame,
                        text="Mover PDFs a carpeta local despues de imprimir",
                        variable=self._v_archive_enabled,
-                       font=("Segoe UI", 9),
+                       font=FONT_BODY,
                        bg=C_BG, fg=C_TEXT, selectcolor=C_SURFACE,
                        activebackground=C_BG, activeforeground=C_TEXT,
                        command=self._on_archive_toggle).pack(side="left")
@@ -649,13 +1510,13 @@ class RuleDialog:
         self._arch_row.pack(fill="x", **pad, pady=(4, 10))
         self._arch_entry = tk.Entry(self._arch_row,
                                     textvariable=self._v_archive_folder,
-                                    font=("Segoe UI", 10), bg=C_INPUT, fg=C_TEXT,
+                                    font=FONT_NORMAL, bg=C_INPUT, fg=C_TEXT,
                                     relief="flat", insertbackground=C_TEXT)
         self._arch_entry.pack(side="left", fill="x", expand=True, ipady=6, padx=(0, 6))
         self._arch_btn = self._btn(self._arch_row, "Examinar", self._browse_archive)
         self._arch_btn.pack(side="left", padx=(0, 4))
         self._arch_new = tk.Button(self._arch_row, text="+ Nueva",
-                                   font=("Segoe UI", 9, "bold"),
+                                   font=FONT_BODY_BOLD,
                                    bg=C_ACCENT, fg="white",
                                    relief="flat", cursor="hand2", padx=8, pady=4,
                                    command=self._create_archive_folder)
@@ -666,33 +1527,38 @@ class RuleDialog:
         tk.Frame(win, bg=C_BORDER, height=1).pack(fill="x", pady=(8, 0))
         btn_row = tk.Frame(win, bg=C_BG, pady=12)
         btn_row.pack(fill="x", **pad)
-        tk.Button(btn_row, text="Guardar",
-                  font=("Segoe UI", 10, "bold"),
-                  bg=C_SUCCESS, fg="white", relief="flat", cursor="hand2",
-                  padx=16, pady=8, command=self._save).pack(side="left", padx=(0, 8))
-        tk.Button(btn_row, text="Cancelar",
-                  font=("Segoe UI", 10), bg=C_CARD, fg=C_TEXT,
-                  relief="flat", cursor="hand2", padx=16, pady=8,
-                  command=self.win.destroy).pack(side="left")
+        ttk.Button(btn_row, text="Guardar", style="AP.Primary.TButton",
+                   cursor="hand2", command=self._save).pack(side="left", padx=(0, 8))
+        ttk.Button(btn_row, text="Cancelar", style="AP.Secondary.TButton",
+                   cursor="hand2", command=self.win.destroy).pack(side="left")
+
+    # Los estilos AP.* se registran una sola vez en AutoPrintApp._build_window
 
     def _field(self, parent, text):
-        tk.Label(parent, text=text,
-                 font=("Segoe UI", 9, "bold"),
-                 bg=C_BG, fg=C_MUTED).pack(anchor="w", padx=20, pady=(0, 3))
+        ttk.Label(parent, text=text, style="AP.Field.TLabel").pack(
+            anchor="w", padx=20, pady=(0, 3))
 
     def _btn(self, parent, text, cmd):
-        return tk.Button(parent, text=text,
-                         font=("Segoe UI", 9), bg=C_CARD, fg=C_TEXT,
-                         relief="flat", cursor="hand2", padx=8, pady=4, command=cmd)
+        return ttk.Button(parent, text=text, style="AP.Small.TButton",
+                          cursor="hand2", command=cmd)
 
     def _get_printers(self):
-        try:
-            return [p[2] for p in win32print.EnumPrinters(2)]
-        except Exception:
-            return []
+        return self.app.get_printers()
 
     def _refresh_printers(self):
-        new = self._get_printers()
+        # EnumPrinters puede tardar segundos con servidores de red lentos:
+        # consultar en segundo plano y volcar el resultado en el hilo de Tk
+        def _worker():
+            new = self.app.get_printers(force=True)
+            try:
+                self.win.after(0, self._apply_printers, new)
+            except Exception:
+                pass
+        self.app.submit_bg(_worker)
+
+    def _apply_printers(self, new):
+        if not self.win.winfo_exists():
+            return
         self._cb_printer["values"] = new
         if new and not self._v_printer.get():
             self._v_printer.set(new[0])
@@ -729,11 +1595,11 @@ class RuleDialog:
         dialog.transient(self.win)
 
         tk.Label(dialog, text="Nombre de la nueva carpeta:",
-                 font=("Segoe UI", 10), bg=C_BG, fg=C_TEXT).pack(
+                 font=FONT_NORMAL, bg=C_BG, fg=C_TEXT).pack(
             pady=(16, 6), padx=20, anchor="w")
         name_var = tk.StringVar(value="PDFs Impresos")
         entry = tk.Entry(dialog, textvariable=name_var,
-                         font=("Segoe UI", 11), bg=C_INPUT, fg=C_TEXT,
+                         font=FONT_LARGE, bg=C_INPUT, fg=C_TEXT,
                          relief="flat", insertbackground=C_TEXT)
         entry.pack(fill="x", padx=20, ipady=7)
         entry.select_range(0, "end")
@@ -757,7 +1623,7 @@ class RuleDialog:
                 messagebox.showerror("Error", str(e), parent=dialog)
 
         tk.Button(dialog, text="Crear",
-                  font=("Segoe UI", 10, "bold"),
+                  font=FONT_NORMAL_BOLD,
                   bg=C_SUCCESS, fg="white", relief="flat", cursor="hand2",
                   padx=14, pady=7, command=do_create).pack(pady=12)
         entry.bind("<Return>", lambda e: do_create())
@@ -787,7 +1653,7 @@ class RuleDialog:
                                    parent=self.win)
             return
 
-        name = self._v_name.get().strip() or folder.split("/")[-1].split("\\")[-1]
+        name = self._v_name.get().strip() or os.path.basename(folder.rstrip("/\\")) or folder
 
         self.result = {
             "name":            name,
@@ -814,76 +1680,156 @@ class _ArchiveHelper:
         self.log_fn(f"{prefix}{msg}")
 
     def move(self, src_path, archive_folder):
-        time.sleep(8)
-        src  = Path(src_path)
-        dest = Path(archive_folder) / src.name
-        if dest.exists():
-            ts   = time.strftime("%Y%m%d_%H%M%S")
-            dest = Path(archive_folder) / f"{src.stem}_{ts}{src.suffix}"
-        copied = False
-        for i in range(1, 7):
-            try:
-                if not src.exists():
-                    return
-                shutil.copy2(str(src), str(dest))
-                copied = True
-                break
-            except Exception as e:
-                self._log(f"Copiando... intento {i}/6 ({e})")
-                time.sleep(5)
-        if not copied:
-            self._log(f"ERROR: No se pudo copiar '{src.name}'")
-            return
-        self._log(f"Copiado a local: {dest.name}")
-        for i in range(1, 11):
-            try:
-                src.unlink()
-                self._log(f"Eliminado del Drive: {src.name}")
-                return
-            except (PermissionError, Exception):
-                time.sleep(6)
+        _archive_file(src_path, archive_folder, self._log)
 
 
 # ===== APLICACION PRINCIPAL =====
 
 class AutoPrintApp:
+    # Una sola instancia, pero sus atributos se leen en callbacks de watchdog,
+    # del monitor de horario y de Tk: slots en vez de __dict__
+    __slots__ = (
+        "acrobat_path", "config", "gdrive_path", "is_watching",
+        "onedrive_path", "root", "sumatra_path", "tray_icon", "widget",
+        "_archive_queue", "_autostart_cmd",
+        "_config_save_after", "_dir_cache", "_flush_executor", "_history",
+        "_history_labels", "_history_txt", "_history_win", "_instance_lock",
+        "_last_watching_state", "_lbl_hoy",
+        "_lbl_pending", "_lbl_total", "_log_buffer", "_log_entries",
+        "_log_flush_pending", "_log_widget", "_icon_imgs", "_logo_lbl",
+        "_logo_photos", "_monitor_running", "_notify_q", "_notify_times",
+        "_observers", "_pending_cache", "_pending_detect",
+        "_pending_lock", "_pool", "_print_queue", "_printers_cache",
+        "_quit_lock", "_quitting", "_rule_card_widgets",
+        "_rules_empty_lbl", "_rules_frame", "_sched_cached_for",
+        "_sched_end_t", "_sched_event", "_sched_row", "_sched_start_t",
+        "_schedule_save_after", "_schedule_was_in",
+        "_scrollregion_pending", "_canvas_width", "_resize_after",
+        "_seen", "_seen_lock", "_settle",
+        "_status_lbl", "_tk_icon", "_toggle_btn", "_tray_ready",
+        "_tray_state",
+        "_ts_cache", "_ui_built", "_v_autostart", "_v_notify_detect",
+        "_v_notify_error", "_v_notify_print", "_v_schedule_enabled",
+        "_v_schedule_end_h", "_v_schedule_end_m", "_v_schedule_start_h",
+        "_v_schedule_start_m", "_v_wait", "_v_watch_interval"
+    )
+
     def __init__(self):
         self.config      = Config()
-        self._observers  = []          # lista de Observer activos
+        self._observers  = []          # Observer nativo (discos locales) y/o de sondeo (red)
+        self._instance_lock = None     # handle de LOCK_FILE (instancia unica)
+        self._tray_ready    = threading.Event()   # el icono de bandeja ya esta registrado
+        self._quitting      = False    # _quit_app ya en curso (bandeja, ventana o widget)
+        self._quit_lock     = threading.Lock()
+        # Comando de la clave Run: se calcula una vez. Con --tray el arranque
+        # con Windows queda en la bandeja sin construir la ventana
+        self._autostart_cmd = (f'"{sys.executable}" --tray' if getattr(sys, "frozen", False)
+                               else f'"{sys.executable}" "{_THIS_PATH}" --tray')
         self.is_watching = False
         self.tray_icon   = None
+        self._tray_state = None        # is_watching ya pintado en el icono de bandeja
         self.root        = None
-        self._log_entries = []
+        self._log_entries = collections.deque(maxlen=300)
+        self._log_buffer  = collections.deque()   # lineas aun no pintadas en el Text
+        self._log_flush_pending = False
+        self._ts_cache    = (0, "")   # (segundo, "HH:MM:SS") del ultimo _log
+        self._last_watching_state = None   # is_watching ya pintado en la cabecera
+        self._icon_imgs   = {}        # is_watching -> icono 64x64 ya dibujado
+        self._logo_photos = {}        # is_watching -> PhotoImage 48x48 de la cabecera
+        self._history_win    = None   # Toplevel del historial, reutilizado
+        self._history_labels = ()
+        self._history_txt    = None
         self.widget      = None
+        self._ui_built   = False       # _build_ui ya ejecutado (se difiere con --tray)
 
         self._status_lbl  = None
+        self._logo_lbl    = None
         self._toggle_btn  = None
         self._log_widget  = None
         self._lbl_hoy     = None
         self._lbl_total   = None
         self._rules_frame = None      # frame donde se muestran las tarjetas de reglas
+        self._rule_card_widgets = []  # una entrada por tarjeta: {frame, name_lbl, ...}
+        self._rules_empty_lbl   = None
 
         self._v_wait            = None
+        self._v_watch_interval  = None
         self._v_autostart       = None
         self._v_notify_detect   = None
         self._v_notify_print    = None
 
-        self.acrobat_path    = self._find_acrobat()
-        self.gdrive_path     = self._find_gdrive()
-        self.onedrive_path   = self._find_onedrive()
-        self._notify_times    = {}    # clave -> timestamp ultimo envio (anti-spam)
+        self._find_paths()
+        self._sync_autostart()
+        self._printers_cache  = (0.0, [])   # (monotonic, lista) de EnumPrinters
+        self._dir_cache       = {}          # carpeta -> (monotonic, existe); ver _existing_dirs_cached
+        self._seen            = collections.OrderedDict()  # (path,size,mtime,printer) -> monotonic
+        self._seen_lock       = threading.Lock()
+        self._notify_times    = {}    # clave -> monotonic del ultimo envio (anti-spam)
+        self._notify_q        = _queue.Queue()
+        threading.Thread(target=self._notify_worker, daemon=True,
+                         name="Notifier").start()
         self._pending_detect  = {}    # rule_name -> archivos pendientes de agrupar
         self._pending_lock    = threading.Lock()
+        self._pending_cache   = None   # copia en memoria de PENDING_FILE
         self._schedule_was_in = False  # estado anterior del horario
         self._monitor_running = False
+        self._sched_event     = threading.Event()  # despierta al monitor al editar el horario
+        self._sched_cached_for = None   # (start_str, end_str) ya convertidos a time
+        self._sched_start_t    = None
+        self._sched_end_t      = None
         self._lbl_pending     = None   # label de pendientes en la UI
         self._v_schedule_enabled = None
         self._v_schedule_start_h = None
         self._v_schedule_start_m = None
         self._v_schedule_end_h   = None
         self._v_schedule_end_m   = None
-        # Cola global de impresion — un solo hilo serializa todos los trabajos
-        self._print_queue     = PrintQueue(log_fn=self._log)
+        self._schedule_save_after = None   # after() pendiente del guardado del horario
+        self._config_save_after   = None   # after() pendiente de _save_from_ui
+        self._history         = HistoryWriter(HISTORY_FILE)
+        # Un solo hilo daemon para vaciar pendientes (arranque, inicio de
+        # horario, boton manual): varios clics seguidos se ejecutan en serie
+        self._flush_executor  = ArchiveQueue(log_fn=self._log, workers=1,
+                                             name="FlushPending",
+                                             error_msg="ERROR vaciando pendientes")
+        # Solo tareas cortas de submit_bg (EnumPrinters del dialogo): sus hilos
+        # no son daemon y el interprete los espera al salir. El escaneo inicial,
+        # el monitor de horario y la bandeja bajan su prioridad y van en hilos
+        # daemon propios, asi ningun hilo del pool queda con prioridad baja
+        self._pool            = ThreadPoolExecutor(max_workers=2, thread_name_prefix="AP")
+        # Cola global de impresion — un solo hilo serializa todos los trabajos;
+        # al quedar vacia se vuelca el historial acumulado de la racha
+        self._print_queue     = PrintQueue(log_fn=self._log,
+                                           sumatra_path=self.sumatra_path,
+                                           raw_printers_fn=lambda: self.config["raw_printers"],
+                                           on_idle=self._history.flush)
+        self._settle          = SettleDispatcher(log_fn=self._log)
+        self._archive_queue   = ArchiveQueue(log_fn=self._log)
+
+    # ------------------------------------------------------------------
+    # Deduplicacion entre reglas
+    # ------------------------------------------------------------------
+
+    _SEEN_TTL = 60   # segundos que se recuerda un PDF ya enviado
+
+    def _seen_recently(self, path, printer):
+        """
+        True si este mismo contenido (misma huella, ver _fingerprint) ya se
+        envio a esta impresora hace poco, desde otra regla o con otro nombre.
+        Dos reglas sobre la misma carpeta con impresoras distintas siguen
+        imprimiendo ambas.
+        """
+        try:
+            key = (_fingerprint(path), printer)
+        except OSError:
+            return False
+        now = time.monotonic()
+        with self._seen_lock:
+            while self._seen and now - next(iter(self._seen.values())) > self._SEEN_TTL:
+                self._seen.popitem(last=False)
+            if key in self._seen:
+                return True
+            self._seen[key] = now
+        return False
 
     # ------------------------------------------------------------------
     # Horario de impresion
@@ -894,19 +1840,20 @@ class AutoPrintApp:
         if not self.config["schedule_enabled"]:
             return True
         try:
-            now   = datetime.now().time()
-            s_str = self.config["schedule_start"]
-            e_str = self.config["schedule_end"]
-            sh, sm = map(int, s_str.split(":"))
-            eh, em = map(int, e_str.split(":"))
-            start = now.replace(hour=sh, minute=sm, second=0, microsecond=0)
-            end   = now.replace(hour=eh, minute=em, second=0, microsecond=0)
+            key = (self.config["schedule_start"], self.config["schedule_end"])
+            if key != self._sched_cached_for:
+                # Solo se vuelve a parsear "HH:MM" cuando cambia el horario
+                sh, sm = map(int, key[0].split(":"))
+                eh, em = map(int, key[1].split(":"))
+                self._sched_start_t    = dt_time(sh, sm)
+                self._sched_end_t      = dt_time(eh, em)
+                self._sched_cached_for = key
+            start, end = self._sched_start_t, self._sched_end_t
+            t = datetime.now().time().replace(second=0, microsecond=0)
             # Soporte para horario que cruza medianoche (e.g. 22:00 - 06:00)
             if start <= end:
-                return start <= now.replace(second=0, microsecond=0) <= end
-            else:
-                t = now.replace(second=0, microsecond=0)
-                return t >= start or t <= end
+                return start <= t <= end
+            return t >= start or t <= end
         except Exception:
             return True
 
@@ -930,23 +1877,30 @@ class AutoPrintApp:
             self.root.after(0, self._refresh_pending_label)
 
     def _load_pending_raw(self) -> list:
+        """Devuelve la lista en memoria; solo se lee el disco la primera vez."""
+        if self._pending_cache is not None:
+            return self._pending_cache
+        jobs = []
         try:
             if PENDING_FILE.exists():
-                with open(PENDING_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                jobs = _read_json(PENDING_FILE)
         except Exception:
             pass
-        return []
+        self._pending_cache = jobs
+        return jobs
 
     def _save_pending_raw(self, jobs: list):
+        self._pending_cache = jobs
         try:
             CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-            with open(PENDING_FILE, "w", encoding="utf-8") as f:
-                json.dump(jobs, f, indent=2, ensure_ascii=False)
+            _write_json(PENDING_FILE, jobs, pretty=False)
         except Exception:
             pass
 
     def pending_count(self) -> int:
+        cache = self._pending_cache
+        if cache is not None:
+            return len(cache)
         with self._pending_lock:
             return len(self._load_pending_raw())
 
@@ -965,41 +1919,35 @@ class AutoPrintApp:
             return
 
         self._log(f"─── Iniciando impresion de {len(jobs)} archivo(s) pendiente(s) ───")
-        for job in jobs:
-            path = job.get("path", "")
-            if not path or not os.path.exists(path):
-                self._log(f"AVISO: archivo ya no existe, omitido: {Path(path).name if path else '?'}")
+        for job in map(PrintJob.from_dict, jobs):
+            path = job.path
+            name = os.path.basename(path)
+            if not path or not _exists_fast(path):
+                self._log(f"AVISO: archivo ya no existe, omitido: {name or '?'}")
                 continue
 
-            rule_name       = job.get("rule_name", "")
-            archive_enabled = job.get("archive_enabled", False)
-            archive_folder  = job.get("archive_folder", "")
-            detected_at     = job.get("detected_at", "")
-            name            = Path(path).name
-            extra           = f" (detectado {detected_at})" if detected_at else ""
-            self._log(f"[{rule_name}] Imprimiendo pendiente: {name}{extra}")
+            extra = f" (detectado {job.detected_at})" if job.detected_at else ""
+            self._log(f"[{job.rule_name}] Imprimiendo pendiente: {name}{extra}")
+
+            # Todo lo que usa el callback se captura ya resuelto
+            archive = job.archive_folder if job.archive_enabled else ""
 
-            def _on_done(status, _job=job, _name=name):
+            def _on_done(status, _name=name, _path=path, _printer=job.printer,
+                         _rule=job.rule_name, _archive=archive):
                 if status == "OK":
-                    self._log(f"[{_job.get('rule_name','')}] OK — Impreso en: {_job['printer']}")
-                    self._on_printed(_name, _job["printer"], "OK", _job.get("rule_name",""))
-                    if _job.get("archive_enabled") and _job.get("archive_folder"):
-                        # Crear un handler temporal solo para archivar
-                        h = PDFHandler.__new__(PDFHandler)
-                        h.archive_folder  = _job["archive_folder"]
-                        h.archive_enabled = True
-                        h.log_fn          = self._log
-                        h.rule_name       = _job.get("rule_name", "")
-                        h._log            = h._log if hasattr(h, '_log') else lambda m: self._log(m)
-                        threading.Thread(target=h._move_to_archive,
-                                         args=(_job["path"],), daemon=True).start()
+                    self._log(f"[{_rule}] OK — Impreso en: {_printer}")
+                    self._on_printed(_name, _printer, "OK", _rule)
+                    if _archive:
+                        h = _ArchiveHelper(self._log, _rule)
+                        self._archive_queue.submit(h.move, _path, _archive)
                 else:
-                    self._log(f"[{_job.get('rule_name','')}] ERROR: {status}")
+                    self._log(f"[{_rule}] ERROR: {status}")
 
             self._print_queue.submit({
-                "acrobat": job.get("acrobat", self.acrobat_path or ""),
+                "acrobat": job.acrobat or self.acrobat_path or "",
                 "path":    path,
-                "printer": job.get("printer", ""),
+                "name":    name,
+                "printer": job.printer,
                 "on_done": _on_done,
             })
 
@@ -1019,8 +1967,7 @@ class AutoPrintApp:
                 f"Imprimiendo {n} archivo(s) guardados del periodo anterior",
                 cooldown_key="startup_flush",
             )
-            threading.Thread(target=self.flush_pending_jobs, daemon=True,
-                             name="FlushOnStart").start()
+            self._flush_executor.submit(self.flush_pending_jobs)
         else:
             sched_start = self.config["schedule_start"] if self.config["schedule_enabled"] else ""
             hora_txt    = f" a las {sched_start}" if sched_start else ""
@@ -1038,8 +1985,7 @@ class AutoPrintApp:
     def _load_last_seen(self) -> dict:
         try:
             if LASTSEEN_FILE.exists():
-                with open(LASTSEEN_FILE, "r", encoding="utf-8") as f:
-                    return json.load(f)
+                return _read_json(LASTSEEN_FILE)
         except Exception:
             pass
         return {}
@@ -1047,8 +1993,7 @@ class AutoPrintApp:
     def _save_last_seen(self, data: dict):
         try:
             CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-            with open(LASTSEEN_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            _write_json(LASTSEEN_FILE, data, pretty=False)
         except Exception:
             pass
 
@@ -1069,44 +2014,51 @@ class AutoPrintApp:
         modificacion sea posterior a la ultima vez que la app estuvo activa.
         Los encontrados se imprimen (si hay horario) o se encolan como pendientes.
         """
+        _lower_thread_priority()
         rules = self.config.get("rules", [])
-        if not rules or not self.acrobat_path:
+        if not rules or not (self.acrobat_path or self.sumatra_path):
             return
 
         last_seen  = self._load_last_seen()
         now_str    = datetime.now().isoformat(timespec="seconds")
         found_any  = 0
 
+        # Timestamp de la ultima vez que vigilamos cada carpeta (None = nunca)
+        scan_ts = []
         for rule in rules:
-            folder  = rule.get("folder", "")
-            printer = rule.get("printer", "")
-            if not folder or not printer or not os.path.exists(folder):
-                continue
-
-            rule_name = rule.get("name") or Path(folder).name
-
-            # Timestamp de la ultima vez que vigilamos esta carpeta
-            last_str = last_seen.get(folder, "")
+            last_str = last_seen.get(rule.get("folder", ""), "")
             if last_str:
                 try:
-                    last_ts = datetime.fromisoformat(last_str).timestamp()
+                    scan_ts.append(datetime.fromisoformat(last_str).timestamp())
                 except Exception:
-                    last_ts = 0.0
+                    scan_ts.append(0.0)
             else:
+                scan_ts.append(None)
+
+        # Las carpetas suelen estar en Drive/OneDrive: listarlas en paralelo
+        # cuesta lo que la mas lenta, no la suma de todas
+        with ThreadPoolExecutor(max_workers=min(8, len(rules)),
+                                thread_name_prefix="Scan") as ex:
+            results = list(ex.map(self._scan_one_rule, rules, scan_ts))
+
+        # El escaneo es corto: el horario se evalua una vez y se refresca cada 100 PDFs
+        in_schedule = self._is_in_schedule()
+
+        for rule, last_ts, (nuevos, error) in zip(rules, scan_ts, results):
+            if nuevos is None:
+                continue
+            folder    = rule["folder"]
+            printer   = rule["printer"]
+            rule_name = rule.get("name") or Path(folder).name
+
+            if last_ts is None:
                 # Primera vez que vemos esta carpeta — no imprimir todo lo que hay
                 self._log(f"[{rule_name}] Primera ejecucion en esta carpeta, omitiendo archivos existentes")
                 last_seen[folder] = now_str
                 continue
 
-            # Buscar PDFs mas nuevos que la ultima vez activo
-            try:
-                nuevos = sorted(
-                    [f for f in Path(folder).iterdir()
-                     if f.suffix.lower() == ".pdf" and f.stat().st_mtime > last_ts],
-                    key=lambda f: f.stat().st_mtime
-                )
-            except Exception as e:
-                self._log(f"[{rule_name}] Error escaneando carpeta: {e}")
+            if error is not None:
+                self._log(f"[{rule_name}] Error escaneando carpeta: {error}")
                 continue
 
             if not nuevos:
@@ -1114,33 +2066,35 @@ class AutoPrintApp:
                 continue
 
             self._log(f"[{rule_name}] {len(nuevos)} PDF(s) llegaron mientras la app estaba cerrada")
-            found_any += len(nuevos)
+            archive    = (rule.get("archive_folder", "")
+                          if rule.get("archive_enabled") else "")
 
-            for pdf in nuevos:
-                path      = str(pdf)
-                name      = pdf.name
-                mtime_str = datetime.fromtimestamp(pdf.stat().st_mtime).strftime("%d/%m %H:%M")
+            _fmt, _lt = time.strftime, time.localtime
+            for mtime, name, path in nuevos:
+                mtime_str = _fmt("%d/%m %H:%M", _lt(mtime))
                 self._log(f"[{rule_name}] PDF perdido: {name} (llegó {mtime_str})")
 
-                if self._is_in_schedule():
+                found_any += 1
+                if found_any % 100 == 0:
+                    in_schedule = self._is_in_schedule()
+                if in_schedule:
                     # Imprimir ahora via cola
-                    def _on_done(status, _rule=rule, _name=name, _path=path):
-                        r_name = _rule.get("name", "")
+                    def _on_done(status, _name=name, _path=path, _printer=printer,
+                                 _rule=rule.get("name", ""), _archive=archive):
                         if status == "OK":
-                            self._log(f"[{r_name}] OK — Impreso en: {_rule['printer']}")
-                            self._on_printed(_name, _rule["printer"], "OK", r_name)
-                            if _rule.get("archive_enabled") and _rule.get("archive_folder"):
-                                h = _ArchiveHelper(self._log, r_name)
-                                threading.Thread(target=h.move,
-                                                 args=(_path, _rule["archive_folder"]),
-                                                 daemon=True).start()
+                            self._log(f"[{_rule}] OK — Impreso en: {_printer}")
+                            self._on_printed(_name, _printer, "OK", _rule)
+                            if _archive:
+                                h = _ArchiveHelper(self._log, _rule)
+                                self._archive_queue.submit(h.move, _path, _archive)
                         else:
-                            self._log(f"[{r_name}] ERROR: {status}")
-                            self._on_printed(_name, _rule["printer"], status, r_name)
+                            self._log(f"[{_rule}] ERROR: {status}")
+                            self._on_printed(_name, _printer, status, _rule)
 
                     self._print_queue.submit({
                         "acrobat": self.acrobat_path,
                         "path":    path,
+                        "name":    name,
                         "printer": printer,
                         "on_done": _on_done,
                     })
@@ -1159,18 +2113,67 @@ class AutoPrintApp:
 
         self._save_last_seen(last_seen)
 
-        if found_any > 0 and self._is_in_schedule():
+        if found_any > 0 and in_schedule:
             self._notify(
                 "AutoPrint — Archivos perdidos",
                 f"{found_any} PDF(s) llegaron mientras la app estaba cerrada — imprimiendo",
                 cooldown_key="missed_found",
             )
 
+    def _scan_one_rule(self, rule, last_ts):
+        """
+        Lista los PDFs de la carpeta de una regla mas nuevos que last_ts.
+        Corre en un hilo del pool: solo devuelve datos, no toca estado.
+        Devuelve (nuevos, error); nuevos=None si la regla no aplica.
+        """
+        folder = rule.get("folder", "")
+        if not folder or not rule.get("printer") or not _exists_fast(folder):
+            return None, None
+        if last_ts is None:
+            return [], None
+        try:
+            return _collect_new(folder, last_ts), None
+        except Exception as e:
+            return [], e
+
+    _SCHED_MAX_WAIT = 3600   # tope de espera: cubre suspensiones y cambios de hora
+
+    def _seconds_to_boundary(self):
+        """Segundos hasta el proximo inicio o fin del horario (None si esta desactivado)."""
+        if not self.config["schedule_enabled"]:
+            return None
+        try:
+            sh, sm = map(int, self.config["schedule_start"].split(":"))
+            eh, em = map(int, self.config["schedule_end"].split(":"))
+        except Exception:
+            return None
+        now  = datetime.now()
+        base = now.replace(second=0, microsecond=0)
+        best = None
+        # El fin es inclusivo: se sale del horario al minuto siguiente
+        for h, m, extra in ((sh, sm, 0), (eh, em, 60)):
+            t = base.replace(hour=h, minute=m) + timedelta(seconds=extra)
+            if t <= now:
+                t += timedelta(days=1)
+            dt   = (t - now).total_seconds()
+            best = dt if best is None else min(best, dt)
+        return best
+
     def _schedule_monitor(self):
-        """Hilo daemon que detecta la transicion fuera->dentro del horario."""
+        """
+        Hilo daemon que detecta la transicion fuera->dentro del horario.
+        Duerme hasta el proximo limite del horario (o hasta que se edite)
+        en lugar de sondear cada 30 s.
+        """
+        _lower_thread_priority()
         self._schedule_was_in = self._is_in_schedule()
         while self._monitor_running:
-            time.sleep(30)
+            dt = self._seconds_to_boundary()
+            timeout = self._SCHED_MAX_WAIT if dt is None else min(max(1, dt), self._SCHED_MAX_WAIT)
+            self._sched_event.wait(timeout=timeout)
+            self._sched_event.clear()
+            if not self._monitor_running:
+                break
             now_in = self._is_in_schedule()
             # Transicion fuera -> dentro del horario
             if not self._schedule_was_in and now_in:
@@ -1184,8 +2187,7 @@ class AutoPrintApp:
                     )
                 else:
                     self._log("Horario iniciado")
-                threading.Thread(target=self.flush_pending_jobs,
-                                 daemon=True, name="FlushPending").start()
+                self._flush_executor.submit(self.flush_pending_jobs)
             # Transicion dentro -> fuera del horario
             elif self._schedule_was_in and not now_in:
                 sched_end = self.config["schedule_start"] if self.config["schedule_enabled"] else ""
@@ -1220,14 +2222,85 @@ class AutoPrintApp:
             eh = max(0, min(23, eh)); em = max(0, min(59, em))
         except (ValueError, AttributeError):
             return
-        self.config["schedule_enabled"] = enabled
-        self.config["schedule_start"]   = f"{sh:02d}:{sm:02d}"
-        self.config["schedule_end"]     = f"{eh:02d}:{em:02d}"
+        self.config.update({
+            "schedule_enabled": enabled,
+            "schedule_start":   f"{sh:02d}:{sm:02d}",
+            "schedule_end":     f"{eh:02d}:{em:02d}",
+        })
+        self._sched_event.set()
 
     # ------------------------------------------------------------------
     # Deteccion de software
     # ------------------------------------------------------------------
 
+    _PRINTERS_TTL = 30   # segundos que se reutiliza la lista de impresoras
+
+    def get_printers(self, force=False):
+        """Lista de impresoras instaladas, cacheada unos segundos."""
+        now = time.monotonic()
+        ts, printers = self._printers_cache
+        if not force and printers and now - ts < self._PRINTERS_TTL:
+            return printers
+        try:
+            import win32print
+            # Locales + conexiones del usuario (nivel 1: p[2] es el nombre). Sin
+            # PRINTER_ENUM_NETWORK, que recorre todo el dominio y es lo lento
+            flags    = win32print.PRINTER_ENUM_LOCAL | win32print.PRINTER_ENUM_CONNECTIONS
+            printers = [p[2] for p in win32print.EnumPrinters(flags, None, 1)]
+        except Exception:
+            return printers
+        self._printers_cache = (now, printers)
+        return printers
+
+    def submit_bg(self, fn, *args):
+        """Ejecuta una tarea corta fuera del hilo de Tk (pool compartido)."""
+        return self._pool.submit(fn, *args)
+
+    _PATHS_TTL = 24 * 3600   # segundos que se confia en paths_cache.json
+
+    def _find_paths(self):
+        """
+        Resuelve las rutas de Acrobat, Sumatra, Google Drive y OneDrive.
+        Reutiliza paths_cache.json si es del mismo usuario, tiene menos de un
+        dia y todas las rutas guardadas siguen existiendo; si no, vuelve a
+        buscar (registro + varias rutas candidatas) y guarda el resultado.
+        Solo se guardan rutas encontradas: lo que falta se busca en cada
+        arranque, asi un lector instalado despues se detecta al reiniciar.
+        """
+        user    = os.environ.get("USERNAME", "")
+        finders = {
+            "acrobat":  self._find_acrobat,
+            "sumatra":  self._find_sumatra,
+            "gdrive":   self._find_gdrive,
+            "onedrive": self._find_onedrive,
+        }
+        found = {}
+        try:
+            cache = _read_json(PATHS_FILE)
+            if (cache.get("username") == user
+                    and time.time() - cache.get("ts", 0) < self._PATHS_TTL
+                    and all(not cache.get(n) or _exists_fast(cache[n]) for n in finders)):
+                found = {n: cache[n] for n in finders if cache.get(n)}
+        except Exception:
+            pass
+
+        missing = [n for n in finders if n not in found]
+        for n in missing:
+            path = finders[n]()
+            if path:
+                found[n] = path
+        self.acrobat_path  = found.get("acrobat")
+        self.sumatra_path  = found.get("sumatra")
+        self.gdrive_path   = found.get("gdrive")
+        self.onedrive_path = found.get("onedrive")
+        if not any(n in found for n in missing) and len(missing) < len(finders):
+            return   # cache valido y la nueva busqueda no encontro nada mas
+        try:
+            _write_json(PATHS_FILE, {"username": user, "ts": time.time(), **found},
+                        pretty=False)
+        except Exception:
+            pass
+
     def _find_acrobat(self):
         for p in [
             r"C:\Program Files\Adobe\Acrobat DC\Acrobat\Acrobat.exe",
@@ -1235,7 +2308,24 @@ class AutoPrintApp:
             r"C:\Program Files (x86)\Adobe\Acrobat Reader DC\Reader\AcroRd32.exe",
             r"C:\Program Files (x86)\Adobe\Acrobat DC\Acrobat\Acrobat.exe",
         ]:
-            if os.path.exists(p):
+            if _exists_fast(p):
+                return p
+        # Otras ediciones (Acrobat 2020, Reader XI...): solo si fallan las
+        # habituales; el resultado queda en paths_cache.json
+        for exe in ("Acrobat.exe", "AcroRd32.exe"):
+            found = glob.glob(rf"C:\Program Files*\Adobe\*\*\{exe}")
+            if found:
+                return sorted(found)[-1]
+        return None
+
+    def _find_sumatra(self):
+        local = os.environ.get("LOCALAPPDATA", "")
+        for p in [
+            r"C:\Program Files\SumatraPDF\SumatraPDF.exe",
+            r"C:\Program Files (x86)\SumatraPDF\SumatraPDF.exe",
+            os.path.join(local, "SumatraPDF", "SumatraPDF.exe") if local else "",
+        ]:
+            if p and _exists_fast(p):
                 return p
         return None
 
@@ -1245,48 +2335,39 @@ class AutoPrintApp:
             (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Google\DriveFS"),
         ]:
             try:
-                key = winreg.OpenKey(hkey, subkey)
-                for val in ("MountPoint", "Path", "RootPath"):
-                    try:
-                        v, _ = winreg.QueryValueEx(key, val)
-                        if v and Path(v).exists():
-                            winreg.CloseKey(key)
-                            return str(v)
-                    except FileNotFoundError:
-                        pass
-                winreg.CloseKey(key)
+                with winreg.OpenKey(hkey, subkey, 0, winreg.KEY_QUERY_VALUE) as key:
+                    for val in ("MountPoint", "Path", "RootPath"):
+                        try:
+                            v, _ = winreg.QueryValueEx(key, val)
+                            if v and _exists_fast(v):
+                                return str(v)
+                        except FileNotFoundError:
+                            pass
             except FileNotFoundError:
                 pass
 
-        user = os.environ.get("USERNAME", "")
-        for p in [
-            Path(f"C:/Users/{user}/Google Drive"),
-            Path(f"C:/Users/{user}/Mi unidad"),
-            Path(f"C:/Users/{user}/My Drive"),
-            Path("G:/My Drive"), Path("G:/"),
-        ]:
-            if p.exists() and p.is_dir():
-                return str(p)
-        return None
+        home       = Path(f"C:/Users/{os.environ.get('USERNAME', '')}")
+        candidates = [home / c for c in _GDRIVE_CANDIDATES] + [Path("G:/My Drive"), Path("G:/")]
+        return next((str(p) for p in candidates if _isdir_fast(p)), None)
 
     def _find_onedrive(self):
         od = os.environ.get("OneDrive", "")
-        if od and Path(od).exists():
+        if od and _exists_fast(od):
             return od
-        user = os.environ.get("USERNAME", "")
-        for p in [
-            Path(f"C:/Users/{user}/OneDrive"),
-            Path(f"C:/Users/{user}/OneDrive - Personal"),
-        ]:
-            if p.exists() and p.is_dir():
-                return str(p)
-        return None
+        home = Path(f"C:/Users/{os.environ.get('USERNAME', '')}")
+        return next((str(p) for p in (home / c for c in _ONEDRIVE_CANDIDATES)
+                     if _isdir_fast(p)), None)
 
     # ------------------------------------------------------------------
     # Icono de bandeja
     # ------------------------------------------------------------------
 
     def _make_icon(self, active=False):
+        """Icono de bandeja para cada estado; se dibuja una sola vez por estado.
+        Los llamadores no lo modifican (resize devuelve una copia)."""
+        img = self._icon_imgs.get(active)
+        if img is not None:
+            return img
         size = 64
         img  = Image.new("RGBA", (size, size), (0, 0, 0, 0))
         d    = ImageDraw.Draw(img)
@@ -1297,10 +2378,24 @@ class AutoPrintApp:
         d.rectangle([20, 36, 44, 52], fill=(220, 220, 220))
         d.line([24, 41, 40, 41], fill=(150, 150, 150), width=1)
         d.line([24, 46, 36, 46], fill=(150, 150, 150), width=1)
+        self._icon_imgs[active] = img
         return img
 
+    def _logo_for(self, active):
+        """PhotoImage 48x48 de la cabecera, una por estado (hilo de Tk)."""
+        photo = self._logo_photos.get(active)
+        if photo is None:
+            from PIL import ImageTk
+            photo = ImageTk.PhotoImage(
+                self._make_icon(active).resize((48, 48), Image.LANCZOS))
+            self._logo_photos[active] = photo
+        return photo
+
     def _update_tray_icon(self):
-        if self.tray_icon:
+        # Asignar .icon recrea el HICON y llama a Shell_NotifyIcon: solo si
+        # el estado pintado cambio
+        if self.tray_icon and self._tray_state != self.is_watching:
+            self._tray_state = self.is_watching
             self.tray_icon.icon = self._make_icon(self.is_watching)
 
     # ------------------------------------------------------------------
@@ -1310,18 +2405,22 @@ class AutoPrintApp:
     def _notify(self, title, msg, cooldown_key=None, cooldown_secs=4):
         """Muestra notificacion de bandeja. cooldown_key evita spam del mismo tipo."""
         if cooldown_key:
-            now = time.time()
-            if now - self._notify_times.get(cooldown_key, 0) < cooldown_secs:
+            now  = time.monotonic()
+            last = self._notify_times.get(cooldown_key)
+            if last is not None and now - last < cooldown_secs:
                 return
             self._notify_times[cooldown_key] = now
+        self._notify_q.put((title, msg))
 
-        def _do():
+    def _notify_worker(self):
+        """Hilo unico que entrega las notificaciones (tray_icon.notify puede tardar)."""
+        while True:
+            title, msg = self._notify_q.get()
             try:
                 if self.tray_icon:
                     self.tray_icon.notify(msg, title)
             except Exception:
                 pass
-        threading.Thread(target=_do, daemon=True).start()
 
     def _on_detected(self, filename, rule_name=""):
         if self.config["notify_detect"]:
@@ -1335,9 +2434,11 @@ class AutoPrintApp:
 
     def _on_printed(self, filename, printer, status, rule_name=""):
         if status == "OK":
-            self.config["printed_today"] = self.config["printed_today"] + 1
-            self.config["printed_total"] = self.config["printed_total"] + 1
-            self.config["last_file"]     = filename
+            self.config.update({
+                "printed_today": self.config["printed_today"] + 1,
+                "printed_total": self.config["printed_total"] + 1,
+                "last_file":     filename,
+            })
             if self.config["notify_print"]:
                 loc = f" — {rule_name}" if rule_name else ""
                 self._notify(
@@ -1363,15 +2464,9 @@ class AutoPrintApp:
                 pass
 
     def _save_history(self, filename, printer, status, rule_name=""):
-        try:
-            CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-            ts   = time.strftime("%Y-%m-%d %H:%M:%S")
-            rule = f" | {rule_name}" if rule_name else ""
-            line = f"{ts} | {filename} | {printer}{rule} | {status}\n"
-            with open(HISTORY_FILE, "a", encoding="utf-8") as f:
-                f.write(line)
-        except Exception:
-            pass
+        ts   = time.strftime("%Y-%m-%d %H:%M:%S")
+        rule = f" | {rule_name}" if rule_name else ""
+        self._history.write(f"{ts} | {filename} | {printer}{rule} | {status}\n")
 
     def _update_counter_ui(self):
         today = self.config["printed_today"]
@@ -1424,12 +2519,14 @@ class AutoPrintApp:
         self.tray_icon = pystray.Icon(
             APP_NAME, self._make_icon(self.is_watching), APP_NAME, menu
         )
+        self._tray_state = self.is_watching
 
     def _tray_show(self, icon=None, item=None):
         if self.root:
             self.root.after(0, self._do_show_window)
 
     def _do_show_window(self):
+        self._ensure_ui()
         self.root.deiconify()
         self.root.lift()
         self.root.focus_force()
@@ -1438,11 +2535,23 @@ class AutoPrintApp:
     # Construccion de la ventana principal
     # ------------------------------------------------------------------
 
-    def _build_window(self):
+    def _build_window(self, show=True):
+        """
+        Crea la raiz Tk y los estilos. Con show=False (arranque con --tray)
+        la ventana queda oculta y los widgets se construyen la primera vez
+        que se abre desde la bandeja.
+        """
+        if self.root:
+            # La raiz y sus widgets viven toda la sesion: solo mostrarla
+            if show:
+                self._do_show_window()
+            return
         root = tk.Tk()
         self.root = root
+        if not show:
+            root.withdraw()
 
-        root.title(f"{APP_NAME} v{APP_VERSION} — Impresion automatica de PDFs")
+        root.title(WINDOW_TITLE)
         root.geometry("580x720")
         root.minsize(500, 540)
         root.resizable(True, True)
@@ -1450,6 +2559,7 @@ class AutoPrintApp:
         root.protocol("WM_DELETE_WINDOW", self._hide_window)
 
         try:
+            from PIL import ImageTk
             ico = self._make_icon(self.is_watching).resize((32, 32))
             self._tk_icon = ImageTk.PhotoImage(ico)
             root.iconphoto(True, self._tk_icon)
@@ -1457,6 +2567,10 @@ class AutoPrintApp:
             pass
 
         self._v_wait           = tk.IntVar(value=self.config["wait_seconds"])
+        self._v_watch_interval = tk.IntVar(value=self.config["watch_interval"])
+        # Se guardan al cambiar, no solo al pulsar Iniciar/Detener
+        self._v_wait.trace_add("write", self._on_config_var)
+        self._v_watch_interval.trace_add("write", self._on_config_var)
         self._v_autostart      = tk.BooleanVar(value=self.config["autostart"])
         self._v_notify_detect  = tk.BooleanVar(value=self.config["notify_detect"])
         self._v_notify_print   = tk.BooleanVar(value=self.config["notify_print"])
@@ -1482,11 +2596,32 @@ class AutoPrintApp:
             background=C_CARD, troughcolor=C_BG,
             arrowcolor=C_MUTED, borderwidth=0)
 
-        self._build_ui()
+        # Estilos compartidos por los dialogos (una sola configuracion Tcl)
+        style.configure("AP.Field.TLabel",
+            font=FONT_BODY_BOLD, background=C_BG, foreground=C_MUTED)
+        for name, bg, font, padding in [
+            ("AP.Primary.TButton",   C_SUCCESS, FONT_NORMAL_BOLD, (16, 8)),
+            ("AP.Secondary.TButton", C_CARD,    FONT_NORMAL,      (16, 8)),
+            ("AP.Small.TButton",     C_CARD,    FONT_BODY,        (8, 4)),
+        ]:
+            fg = "white" if bg == C_SUCCESS else C_TEXT
+            style.configure(name, font=font, background=bg, foreground=fg,
+                            padding=padding, relief="flat", borderwidth=0)
+            style.map(name,
+                background=[("disabled", C_BG), ("active", bg)],
+                foreground=[("disabled", C_MUTED)])
+
+        if show:
+            self._ensure_ui()
 
         if self.config["widget_visible"]:
             root.after(500, self._do_toggle_widget)
 
+    def _ensure_ui(self):
+        if not self._ui_built:
+            self._ui_built = True
+            self._build_ui()
+
     def _build_ui(self):
         root = self.root
 
@@ -1495,20 +2630,17 @@ class AutoPrintApp:
         hdr.pack(fill="x", side="top")
 
         try:
-            logo_img         = self._make_icon(self.is_watching).resize((48, 48), Image.LANCZOS)
-            self._logo_photo = ImageTk.PhotoImage(logo_img)
-            self._logo_lbl   = tk.Label(hdr, image=self._logo_photo, bg=C_CARD)
+            self._logo_lbl = tk.Label(hdr, image=self._logo_for(self.is_watching), bg=C_CARD)
             self._logo_lbl.pack(side="left", padx=(16, 8), pady=12)
         except Exception:
-            self._logo_photo = None
-            self._logo_lbl   = None
+            self._logo_lbl = None
 
         hdr_text = tk.Frame(hdr, bg=C_CARD)
         hdr_text.pack(side="left", pady=12)
         tk.Label(hdr_text, text="AutoPrint",
                  font=("Segoe UI", 18, "bold"), bg=C_CARD, fg=C_TEXT).pack(anchor="w")
         tk.Label(hdr_text, text=f"v{APP_VERSION} — Impresion automatica de PDFs",
-                 font=("Segoe UI", 8), bg=C_CARD, fg=C_MUTED).pack(anchor="w")
+                 font=FONT_SMALL, bg=C_CARD, fg=C_MUTED).pack(anchor="w")
 
         # Contadores
         cnt_frame = tk.Frame(hdr, bg=C_CARD)
@@ -1520,7 +2652,7 @@ class AutoPrintApp:
             hoy_frame, text=str(self.config["printed_today"]),
             font=("Segoe UI", 20, "bold"), bg=C_CARD, fg=C_SUCCESS)
         self._lbl_hoy.pack()
-        tk.Label(hoy_frame, text="hoy", font=("Segoe UI", 7),
+        tk.Label(hoy_frame, text="hoy", font=FONT_TINY,
                  bg=C_CARD, fg=C_MUTED).pack()
 
         total_frame = tk.Frame(cnt_frame, bg=C_CARD)
@@ -1529,12 +2661,12 @@ class AutoPrintApp:
             total_frame, text=str(self.config["printed_total"]),
             font=("Segoe UI", 20, "bold"), bg=C_CARD, fg=C_TEXT)
         self._lbl_total.pack()
-        tk.Label(total_frame, text="total", font=("Segoe UI", 7),
+        tk.Label(total_frame, text="total", font=FONT_TINY,
                  bg=C_CARD, fg=C_MUTED).pack()
 
         self._status_lbl = tk.Label(
             hdr, text="Detenido",
-            font=("Segoe UI", 9, "bold"), bg=C_CARD, fg=C_DANGER)
+            font=FONT_BODY_BOLD, bg=C_CARD, fg=C_DANGER)
         self._status_lbl.pack(side="right", padx=(0, 8))
 
         # ── Botones fijos al fondo ─────────────────────────────────────
@@ -1544,29 +2676,29 @@ class AutoPrintApp:
         self._toggle_btn = tk.Button(
             btn_row,
             text="Iniciar" if not self.is_watching else "Detener",
-            font=("Segoe UI", 11, "bold"),
+            font=FONT_LARGE_BOLD,
             bg=C_SUCCESS if not self.is_watching else C_DANGER,
             fg="white", relief="flat", cursor="hand2",
             pady=10, padx=18, command=self._toggle_ui)
         self._toggle_btn.pack(side="left", fill="x", expand=True, padx=(0, 5))
 
         tk.Button(btn_row, text="Widget",
-                  font=("Segoe UI", 10), bg=C_CARD, fg=C_TEXT,
+                  font=FONT_NORMAL, bg=C_CARD, fg=C_TEXT,
                   relief="flat", cursor="hand2", pady=10, padx=10,
                   command=self._do_toggle_widget).pack(side="left", padx=(0, 5))
 
         tk.Button(btn_row, text="Historial",
-                  font=("Segoe UI", 10), bg=C_CARD, fg=C_TEXT,
+                  font=FONT_NORMAL, bg=C_CARD, fg=C_TEXT,
                   relief="flat", cursor="hand2", pady=10, padx=10,
                   command=self._open_history).pack(side="left", padx=(0, 5))
 
         tk.Button(btn_row, text="Ocultar",
-                  font=("Segoe UI", 10), bg=C_CARD, fg=C_TEXT,
+                  font=FONT_NORMAL, bg=C_CARD, fg=C_TEXT,
                   relief="flat", cursor="hand2", pady=10, padx=10,
                   command=self._hide_window).pack(side="left", padx=(0, 5))
 
         tk.Button(btn_row, text="Apagar",
-                  font=("Segoe UI", 10, "bold"), bg="#7f1d1d", fg="white",
+                  font=FONT_NORMAL_BOLD, bg="#7f1d1d", fg="white",
                   relief="flat", cursor="hand2", pady=10, padx=10,
                   command=self._confirm_quit).pack(side="left")
 
@@ -1585,12 +2717,50 @@ class AutoPrintApp:
         inner    = tk.Frame(canvas, bg=C_BG)
         inner_id = canvas.create_window((0, 0), window=inner, anchor="nw")
 
-        canvas.bind("<Configure>",
-                    lambda e: canvas.itemconfig(inner_id, width=e.width))
-        inner.bind("<Configure>",
-                   lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
-        canvas.bind_all("<MouseWheel>",
-                        lambda e: canvas.yview_scroll(int(-1*(e.delta/120)), "units"))
+        # Arrastrar el borde de la ventana manda decenas de <Configure> por
+        # segundo: se aplica solo el ultimo y el ancho solo si cambio (cada
+        # itemconfig(width=) re-distribuye todo `inner`)
+        self._canvas_width  = 0
+        self._resize_after  = None
+
+        def _apply_canvas_size(width):
+            self._resize_after = None
+            if width != self._canvas_width:
+                self._canvas_width = width
+                canvas.itemconfig(inner_id, width=width)
+
+        def _on_canvas_configure(e):
+            if self._resize_after is not None:
+                canvas.after_cancel(self._resize_after)
+            self._resize_after = canvas.after(16, _apply_canvas_size, e.width)
+        canvas.bind("<Configure>", _on_canvas_configure)
+        # Al construir secciones o tarjetas llegan rafagas de <Configure>:
+        # el scrollregion se recalcula una sola vez por rafaga
+        self._scrollregion_pending = False
+
+        def _apply_scrollregion():
+            # El unico item del canvas es `inner`: su tamano pedido basta
+            self._scrollregion_pending = False
+            canvas.configure(scrollregion=(0, 0, inner.winfo_reqwidth(),
+                                           inner.winfo_reqheight()))
+
+        def _on_inner_configure(e):
+            if not self._scrollregion_pending:
+                self._scrollregion_pending = True
+                canvas.after(30, _apply_scrollregion)
+        inner.bind("<Configure>", _on_inner_configure)
+        # La rueda solo se captura mientras el puntero esta sobre el canvas
+        def _on_wheel(e):
+            canvas.yview_scroll(-1 if e.delta > 0 else 1, "units")
+
+        def _on_leave(e):
+            # Pasar a un hijo (tarjeta, Text del log) tambien genera <Leave>
+            w = canvas.winfo_containing(e.x_root, e.y_root)
+            if w is None or not str(w).startswith(str(canvas)):
+                canvas.unbind_all("<MouseWheel>")
+
+        canvas.bind("<Enter>", lambda e: canvas.bind_all("<MouseWheel>", _on_wheel))
+        canvas.bind("<Leave>", _on_leave)
 
         body = tk.Frame(inner, bg=C_BG, padx=16, pady=10)
         body.pack(fill="both", expand=True)
@@ -1605,18 +2775,13 @@ class AutoPrintApp:
         log_card = tk.Frame(body, bg=C_SURFACE, padx=12, pady=10)
         log_card.pack(fill="x", pady=(0, 6))
 
-        log_hdr = tk.Frame(log_card, bg=C_SURFACE)
+        log_hdr = self._make_button_row(log_card, C_SURFACE, [
+            ("Exportar", self._export_log, {"side": "right", "gap": (4, 0)}),
+            ("Limpiar",  self._clear_log,  {"side": "right"}),
+        ], font=FONT_SMALL, bg=C_SURFACE, fg=C_MUTED)
         log_hdr.pack(fill="x")
         tk.Label(log_hdr, text="Registro de actividad",
-                 font=("Segoe UI", 9, "bold"), bg=C_SURFACE, fg=C_MUTED).pack(side="left")
-        tk.Button(log_hdr, text="Exportar",
-                  font=("Segoe UI", 8), bg=C_SURFACE, fg=C_MUTED,
-                  relief="flat", cursor="hand2",
-                  command=self._export_log).pack(side="right", padx=(4, 0))
-        tk.Button(log_hdr, text="Limpiar",
-                  font=("Segoe UI", 8), bg=C_SURFACE, fg=C_MUTED,
-                  relief="flat", cursor="hand2",
-                  command=self._clear_log).pack(side="right")
+                 font=FONT_BODY_BOLD, bg=C_SURFACE, fg=C_MUTED).pack(side="left")
 
         log_scroll = tk.Scrollbar(log_card)
         log_scroll.pack(side="right", fill="y")
@@ -1624,13 +2789,20 @@ class AutoPrintApp:
         self._log_widget = tk.Text(
             log_card, height=7,
             bg="#0a0a1a", fg=C_MUTED,
-            font=("Consolas", 9),
+            font=FONT_MONO,
             state="disabled", relief="flat", bd=0,
             insertbackground=C_TEXT,
             yscrollcommand=log_scroll.set)
         self._log_widget.pack(fill="x", pady=(4, 0))
         log_scroll.config(command=self._log_widget.yview)
 
+        # Sobre el log la rueda desplaza solo el log: "break" evita que el
+        # bind_all del canvas desplace tambien la ventana
+        def _on_log_wheel(e, w=self._log_widget):
+            w.yview_scroll(-1 if e.delta > 0 else 1, "units")
+            return "break"
+        self._log_widget.bind("<MouseWheel>", _on_log_wheel)
+
         # Tags de color por tipo de mensaje
         self._log_widget.tag_config("ok",      foreground=C_SUCCESS)
         self._log_widget.tag_config("error",   foreground=C_DANGER)
@@ -1642,9 +2814,10 @@ class AutoPrintApp:
         self._log_widget.tag_config("sep",     foreground="#2d3748")
         self._log_widget.tag_config("info",    foreground=C_MUTED)
 
-        for entry in self._log_entries[-30:]:
-            self._append_log_widget(entry)
+        n = len(self._log_entries)
+        self._append_log_widget(list(itertools.islice(self._log_entries, max(0, n - 30), n)))
 
+        self._last_watching_state = None   # widgets nuevos: aplicar el estado si o si
         self._refresh_status_ui()
 
     # ------------------------------------------------------------------
@@ -1654,7 +2827,7 @@ class AutoPrintApp:
     def _section(self, parent, title, fn):
         card = tk.Frame(parent, bg=C_SURFACE, padx=14, pady=10)
         card.pack(fill="x", pady=(0, 8))
-        tk.Label(card, text=title, font=("Segoe UI", 10, "bold"),
+        tk.Label(card, text=title, font=FONT_NORMAL_BOLD,
                  bg=C_SURFACE, fg=C_TEXT).pack(anchor="w", pady=(0, 7))
         fn(card)
 
@@ -1670,82 +2843,154 @@ class AutoPrintApp:
             drives.append(f"OneDrive: {self.onedrive_path}")
         if drives:
             tk.Label(info_row, text="  ".join(drives),
-                     font=("Segoe UI", 8), bg=C_SURFACE, fg=C_SUCCESS).pack(side="left")
+                     font=FONT_SMALL, bg=C_SURFACE, fg=C_SUCCESS).pack(side="left")
         else:
             tk.Label(info_row, text="No se detecto Google Drive ni OneDrive",
-                     font=("Segoe UI", 8), bg=C_SURFACE, fg=C_MUTED).pack(side="left")
+                     font=FONT_SMALL, bg=C_SURFACE, fg=C_MUTED).pack(side="left")
 
-        if not self.acrobat_path:
+        if not self.acrobat_path and not self.sumatra_path:
             tk.Label(parent, text="Adobe Acrobat no encontrado — necesario para imprimir",
-                     font=("Segoe UI", 8), bg=C_SURFACE, fg=C_DANGER).pack(anchor="w", pady=(0, 6))
+                     font=FONT_SMALL, bg=C_SURFACE, fg=C_DANGER).pack(anchor="w", pady=(0, 6))
 
-        # Frame de tarjetas de reglas
-        self._rules_frame = tk.Frame(parent, bg=C_SURFACE)
+        # Canvas de tarjetas de reglas: todas las tarjetas en un solo widget
+        self._rules_frame = tk.Canvas(parent, bg=C_SURFACE, height=1,
+                                      highlightthickness=0, bd=0)
         self._rules_frame.pack(fill="x")
+        self._rules_frame.bind("<Configure>", lambda e: self._layout_rule_cards())
+        self._rule_card_widgets = []
+        self._rules_empty_lbl   = None
         self._render_rules()
 
         # Boton agregar
         tk.Button(parent, text="+ Agregar regla",
-                  font=("Segoe UI", 9, "bold"),
+                  font=FONT_BODY_BOLD,
                   bg=C_CARD, fg=C_TEXT,
                   relief="flat", cursor="hand2", padx=10, pady=6,
                   command=self._add_rule).pack(anchor="w", pady=(8, 0))
 
+    # Geometria de las tarjetas dibujadas en el canvas de reglas (px). Las
+    # alturas de linea salen del bbox real del texto (fuentes en puntos)
+    _CARD_PADX     = 10
+    _CARD_PADY     = 8
+    _CARD_GAP      = 5
+    _CARD_HEAD_GAP = 2   # entre la fila del nombre/botones y la primera linea
+
     def _render_rules(self):
-        """Redibuja todas las tarjetas de reglas."""
+        """
+        Actualiza las tarjetas de reglas: las existentes se reutilizan
+        cambiando solo sus textos, se crean las que faltan y se borran
+        las sobrantes. Cada tarjeta son items del canvas de reglas; solo
+        los dos botones son widgets reales.
+        """
         if not self._rules_frame:
             return
-        for w in self._rules_frame.winfo_children():
-            w.destroy()
-
+        c     = self._rules_frame
         rules = self.config["rules"]
-        if not rules:
-            tk.Label(self._rules_frame,
-                     text="Sin reglas — agrega al menos una para empezar",
-                     font=("Segoe UI", 9), bg=C_SURFACE, fg=C_MUTED).pack(
-                anchor="w", pady=4)
-            return
+        cards = self._rule_card_widgets
 
+        while len(cards) > len(rules):
+            card = cards.pop()
+            c.delete(card["tag"])
+            card["edit_btn"].destroy()
+            card["del_btn"].destroy()
         for i, rule in enumerate(rules):
-            self._rule_card(self._rules_frame, i, rule)
-
-    def _rule_card(self, parent, idx, rule):
-        """Tarjeta visual para una regla."""
-        card = tk.Frame(parent, bg=C_CARD, padx=10, pady=8)
-        card.pack(fill="x", pady=(0, 5))
-
-        # Fila principal: nombre + botones
-        top = tk.Frame(card, bg=C_CARD)
-        top.pack(fill="x")
-
-        name = rule.get("name") or rule.get("folder", "Regla")
-        tk.Label(top, text=f"  {name}",
-                 font=("Segoe UI", 10, "bold"),
-                 bg=C_CARD, fg=C_TEXT).pack(side="left")
-
-        tk.Button(top, text="Editar",
-                  font=("Segoe UI", 8), bg=C_SURFACE, fg=C_TEXT,
-                  relief="flat", cursor="hand2", padx=6, pady=2,
-                  command=lambda i=idx: self._edit_rule(i)).pack(side="right", padx=(4, 0))
-        tk.Button(top, text="X",
-                  font=("Segoe UI", 8), bg=C_SURFACE, fg=C_DANGER,
-                  relief="flat", cursor="hand2", padx=6, pady=2,
-                  command=lambda i=idx: self._delete_rule(i)).pack(side="right")
-
-        # Detalles
+            if i >= len(cards):
+                cards.append(self._rule_card(c, i))
+            self._fill_rule_card(cards[i], rule)
+
+        if rules:
+            if self._rules_empty_lbl:
+                c.delete(self._rules_empty_lbl)
+                self._rules_empty_lbl = None
+        elif not self._rules_empty_lbl:
+            self._rules_empty_lbl = c.create_text(
+                0, 4, anchor="nw", fill=C_MUTED, font=FONT_BODY,
+                text="Sin reglas — agrega al menos una para empezar")
+        self._layout_rule_cards()
+
+    def _rule_card(self, canvas, idx):
+        """Crea los items de una tarjeta (sin texto ni posicion todavia)."""
+        tag = f"card{idx}"
+        new = lambda **kw: canvas.create_text(0, 0, anchor="nw", tags=tag, **kw)
+        edit_btn = tk.Button(canvas, text="Editar",
+                             font=FONT_SMALL, bg=C_SURFACE, fg=C_TEXT,
+                             relief="flat", cursor="hand2", padx=6, pady=2,
+                             command=lambda i=idx: self._edit_rule(i))
+        del_btn = tk.Button(canvas, text="X",
+                            font=FONT_SMALL, bg=C_SURFACE, fg=C_DANGER,
+                            relief="flat", cursor="hand2", padx=6, pady=2,
+                            command=lambda i=idx: self._delete_rule(i))
+        return {
+            "tag":         tag,
+            "rect":        canvas.create_rectangle(0, 0, 0, 0, fill=C_CARD,
+                                                   outline="", tags=tag),
+            "name":        new(font=FONT_NORMAL_BOLD, fill=C_TEXT),
+            "folder":      new(font=FONT_SMALL, fill=C_MUTED),
+            "printer":     new(font=FONT_SMALL, fill=C_MUTED),
+            "archive":     new(font=FONT_SMALL, fill=C_SUCCESS),
+            "edit_btn":    edit_btn,
+            "del_btn":     del_btn,
+            "edit_win":    canvas.create_window(0, 0, anchor="ne", window=edit_btn, tags=tag),
+            "del_win":     canvas.create_window(0, 0, anchor="ne", window=del_btn, tags=tag),
+            "has_archive": False,
+        }
+
+    def _fill_rule_card(self, card, rule):
+        """Pone los textos de una regla en una tarjeta ya creada."""
+        c       = self._rules_frame
+        name    = rule.get("name") or rule.get("folder", "Regla")
         folder  = rule.get("folder", "")
         printer = rule.get("printer", "")
         archive = rule.get("archive_folder", "") if rule.get("archive_enabled") else ""
 
         folder_short = (folder[:52] + "...") if len(folder) > 55 else folder
-        tk.Label(card, text=f"Carpeta: {folder_short}",
-                 font=("Segoe UI", 8), bg=C_CARD, fg=C_MUTED).pack(anchor="w", pady=(3, 0))
-        tk.Label(card, text=f"Impresora: {printer}",
-                 font=("Segoe UI", 8), bg=C_CARD, fg=C_MUTED).pack(anchor="w")
+        c.itemconfig(card["name"],    text=f"  {name}")
+        c.itemconfig(card["folder"],  text=f"Carpeta: {folder_short}")
+        c.itemconfig(card["printer"], text=f"Impresora: {printer}")
         if archive:
             archive_short = (archive[:52] + "...") if len(archive) > 55 else archive
-            tk.Label(card, text=f"Archivo: {archive_short}",
-                     font=("Segoe UI", 8), bg=C_CARD, fg=C_SUCCESS).pack(anchor="w")
+            c.itemconfig(card["archive"], text=f"Archivo: {archive_short}", state="normal")
+        else:
+            c.itemconfig(card["archive"], state="hidden")
+        card["has_archive"] = bool(archive)
+
+    def _layout_rule_cards(self):
+        """Coloca las tarjetas una debajo de otra y ajusta la altura del canvas."""
+        c = self._rules_frame
+        if not c:
+            return
+        width = c.winfo_width()
+        if width <= 1:
+            width = c.winfo_reqwidth()
+        padx, pady = self._CARD_PADX, self._CARD_PADY
+        text_w     = max(width - 2 * padx, 1)
+        y = 0
+        for card in self._rule_card_widgets:
+            del_w  = card["del_btn"].winfo_reqwidth()
+            btns_w = del_w + 4 + card["edit_btn"].winfo_reqwidth()
+            btns_h = card["del_btn"].winfo_reqheight()
+            # El nombre se ajusta al hueco a la izquierda de Editar/X; el
+            # resto de lineas, al ancho completo. width= hace que Tk parta
+            # el texto en lugar de pasar por debajo de los botones
+            c.itemconfig(card["name"], width=max(text_w - btns_w - 6, 1))
+            c.coords(card["name"], padx, y + pady)
+            # bbox es None para un texto vacio
+            _, y0, _, y1 = c.bbox(card["name"]) or (0, 0, 0, 0)
+            ty = y + pady + max(y1 - y0, btns_h) + self._CARD_HEAD_GAP
+            keys = ("folder", "printer", "archive") if card["has_archive"] else ("folder", "printer")
+            for key in keys:
+                c.itemconfig(card[key], width=text_w)
+                c.coords(card[key], padx, ty)
+                _, y0, _, y1 = c.bbox(card[key]) or (0, 0, 0, 0)
+                ty += y1 - y0
+            h = ty - y + pady
+            c.coords(card["rect"], 0, y, width, y + h)
+            c.coords(card["del_win"], width - padx, y + pady)
+            c.coords(card["edit_win"], width - padx - del_w - 4, y + pady)
+            y += h + self._CARD_GAP
+        if self._rules_empty_lbl:
+            y = 28
+        c.configure(height=max(y - self._CARD_GAP, 1))
 
     def _add_rule(self):
         RuleDialog(self.root, self, rule=None, on_save=self._on_rule_saved)
@@ -1756,47 +3001,50 @@ class AutoPrintApp:
             RuleDialog(self.root, self, rule=rules[idx],
                        on_save=lambda r, i=idx: self._on_rule_edited(i, r))
 
+    def _config_dirty(self):
+        """Guarda la config tras modificar en el sitio una de sus listas."""
+        self._dir_cache.clear()   # las carpetas de las reglas pueden haber cambiado
+        self.config.save()
+
     def _on_rule_saved(self, rule):
-        rules = list(self.config["rules"])
-        rules.append(rule)
-        self.config["rules"] = rules
+        self.config["rules"].append(rule)
+        self._config_dirty()
         self._render_rules()
 
     def _on_rule_edited(self, idx, rule):
-        rules = list(self.config["rules"])
-        rules[idx] = rule
-        self.config["rules"] = rules
+        self.config["rules"][idx] = rule
+        self._config_dirty()
         self._render_rules()
 
     def _delete_rule(self, idx):
-        rules = list(self.config["rules"])
+        rules = self.config["rules"]
         name  = rules[idx].get("name", f"Regla {idx+1}")
         if messagebox.askyesno("Eliminar regla",
                                f"Eliminar la regla '{name}'?",
                                parent=self.root):
             rules.pop(idx)
-            self.config["rules"] = rules
+            self._config_dirty()
             self._render_rules()
 
     def _sec_schedule(self, parent):
         def _time_spinbox(frame, var, from_, to_):
             return tk.Spinbox(frame, textvariable=var, from_=from_, to=to_,
-                              width=3, font=("Segoe UI", 11, "bold"),
+                              width=3, font=FONT_LARGE_BOLD,
                               bg=C_INPUT, fg=C_TEXT, relief="flat",
                               buttonbackground=C_CARD, format="%02.0f",
-                              command=self._save_schedule_from_ui)
+                              command=self._debounced_schedule_save)
 
         # Toggle "siempre" / "con horario"
         top = tk.Frame(parent, bg=C_SURFACE)
         top.pack(fill="x", pady=(0, 8))
         tk.Radiobutton(top, text="Siempre activo",
                        variable=self._v_schedule_enabled, value=False,
-                       font=("Segoe UI", 9), bg=C_SURFACE, fg=C_TEXT,
+                       font=FONT_BODY, bg=C_SURFACE, fg=C_TEXT,
                        selectcolor=C_BG, activebackground=C_SURFACE,
                        command=self._on_schedule_toggle).pack(side="left", padx=(0, 20))
         tk.Radiobutton(top, text="Solo en este horario:",
                        variable=self._v_schedule_enabled, value=True,
-                       font=("Segoe UI", 9), bg=C_SURFACE, fg=C_TEXT,
+                       font=FONT_BODY, bg=C_SURFACE, fg=C_TEXT,
                        selectcolor=C_BG, activebackground=C_SURFACE,
                        command=self._on_schedule_toggle).pack(side="left")
 
@@ -1805,27 +3053,27 @@ class AutoPrintApp:
         self._sched_row.pack(fill="x", pady=(0, 6))
 
         tk.Label(self._sched_row, text="De",
-                 font=("Segoe UI", 9), bg=C_SURFACE, fg=C_MUTED).pack(side="left", padx=(0, 6))
+                 font=FONT_BODY, bg=C_SURFACE, fg=C_MUTED).pack(side="left", padx=(0, 6))
         _time_spinbox(self._sched_row, self._v_schedule_start_h, 0, 23).pack(side="left")
         tk.Label(self._sched_row, text=":",
-                 font=("Segoe UI", 11, "bold"), bg=C_SURFACE, fg=C_TEXT).pack(side="left")
+                 font=FONT_LARGE_BOLD, bg=C_SURFACE, fg=C_TEXT).pack(side="left")
         _time_spinbox(self._sched_row, self._v_schedule_start_m, 0, 59).pack(side="left", padx=(0, 14))
 
         tk.Label(self._sched_row, text="a",
-                 font=("Segoe UI", 9), bg=C_SURFACE, fg=C_MUTED).pack(side="left", padx=(0, 6))
+                 font=FONT_BODY, bg=C_SURFACE, fg=C_MUTED).pack(side="left", padx=(0, 6))
         _time_spinbox(self._sched_row, self._v_schedule_end_h, 0, 23).pack(side="left")
         tk.Label(self._sched_row, text=":",
-                 font=("Segoe UI", 11, "bold"), bg=C_SURFACE, fg=C_TEXT).pack(side="left")
+                 font=FONT_LARGE_BOLD, bg=C_SURFACE, fg=C_TEXT).pack(side="left")
         _time_spinbox(self._sched_row, self._v_schedule_end_m, 0, 59).pack(side="left", padx=(0, 16))
 
         tk.Button(self._sched_row, text="Guardar",
-                  font=("Segoe UI", 9), bg=C_CARD, fg=C_TEXT,
+                  font=FONT_BODY, bg=C_CARD, fg=C_TEXT,
                   relief="flat", cursor="hand2", padx=8, pady=3,
                   command=self._save_schedule_from_ui).pack(side="left")
 
         tk.Label(parent,
                  text="Los PDFs que lleguen fuera del horario se guardan y se imprimen al inicio del siguiente periodo",
-                 font=("Segoe UI", 8), bg=C_SURFACE, fg=C_MUTED,
+                 font=FONT_SMALL, bg=C_SURFACE, fg=C_MUTED,
                  wraplength=500, justify="left").pack(anchor="w", pady=(0, 4))
 
         # Aviso si autostart esta desactivado
@@ -1833,7 +3081,7 @@ class AutoPrintApp:
             tk.Label(parent,
                      text="Consejo: activa 'Iniciar con Windows' (seccion Sistema) para que la app "
                           "arranque sola tras un reinicio y no pierda archivos pendientes",
-                     font=("Segoe UI", 8), bg=C_SURFACE, fg=C_WARNING,
+                     font=FONT_SMALL, bg=C_SURFACE, fg=C_WARNING,
                      wraplength=500, justify="left").pack(anchor="w", pady=(0, 8))
         else:
             tk.Frame(parent, bg=C_SURFACE, height=4).pack()
@@ -1843,21 +3091,31 @@ class AutoPrintApp:
         pend_row.pack(fill="x")
 
         self._lbl_pending = tk.Label(pend_row, text="Sin archivos pendientes",
-                                     font=("Segoe UI", 8, "bold"),
+                                     font=FONT_SMALL_BOLD,
                                      bg=C_SURFACE, fg=C_MUTED)
         self._lbl_pending.pack(side="left")
 
         tk.Button(pend_row, text="Imprimir pendientes ahora",
-                  font=("Segoe UI", 8), bg=C_CARD, fg=C_TEXT,
+                  font=FONT_SMALL, bg=C_CARD, fg=C_TEXT,
                   relief="flat", cursor="hand2", padx=8, pady=3,
-                  command=lambda: threading.Thread(
-                      target=lambda: self.flush_pending_jobs(force=True),
-                      daemon=True).start()
+                  command=lambda: self._flush_executor.submit(
+                      self.flush_pending_jobs, force=True)
                   ).pack(side="left", padx=(10, 0))
 
         self._on_schedule_toggle()
         self._refresh_pending_label()
 
+    def _debounced_schedule_save(self):
+        """Mantener pulsada la flecha del spinbox genera muchos clics: se guarda
+        una sola vez, 300 ms despues del ultimo."""
+        if self._schedule_save_after is not None:
+            self.root.after_cancel(self._schedule_save_after)
+        self._schedule_save_after = self.root.after(300, self._run_schedule_save)
+
+    def _run_schedule_save(self):
+        self._schedule_save_after = None
+        self._save_schedule_from_ui()
+
     def _on_schedule_toggle(self):
         enabled = self._v_schedule_enabled.get()
         state   = "normal" if enabled else "disabled"
@@ -1876,7 +3134,7 @@ class AutoPrintApp:
         ]
         for i, (text, var, key) in enumerate(options):
             tk.Checkbutton(parent, text=text,
-                           variable=var, font=("Segoe UI", 9),
+                           variable=var, font=FONT_BODY,
                            bg=C_SURFACE, fg=C_TEXT, selectcolor=C_BG,
                            activebackground=C_SURFACE, activeforeground=C_TEXT,
                            command=lambda k=key, v=var: self.config.__setitem__(k, v.get())
@@ -1884,28 +3142,39 @@ class AutoPrintApp:
 
         tk.Label(parent,
                  text="Las notificaciones tienen control de frecuencia para evitar spam",
-                 font=("Segoe UI", 8), bg=C_SURFACE, fg=C_MUTED
+                 font=FONT_SMALL, bg=C_SURFACE, fg=C_MUTED
                  ).pack(anchor="w", pady=(7, 0))
 
     def _sec_config(self, parent):
         row = tk.Frame(parent, bg=C_SURFACE)
         row.pack(fill="x")
-        tk.Label(row, text="Espera antes de imprimir (seg):",
-                 font=("Segoe UI", 9), bg=C_SURFACE, fg=C_MUTED).pack(side="left")
+        tk.Label(row, text="Espera maxima antes de imprimir (seg):",
+                 font=FONT_BODY, bg=C_SURFACE, fg=C_MUTED).pack(side="left")
         tk.Spinbox(row, from_=1, to=60, textvariable=self._v_wait, width=5,
-                   font=("Segoe UI", 10), bg=C_INPUT, fg=C_TEXT, relief="flat",
+                   font=FONT_NORMAL, bg=C_INPUT, fg=C_TEXT, relief="flat",
                    buttonbackground=C_CARD).pack(side="left", padx=(10, 0), ipady=3)
 
-        if self.acrobat_path:
+        # Solo afecta a carpetas de red / extraibles (PollingObserver)
+        row = tk.Frame(parent, bg=C_SURFACE)
+        row.pack(fill="x", pady=(6, 0))
+        tk.Label(row, text="Sondeo en carpetas de red (seg):",
+                 font=FONT_BODY, bg=C_SURFACE, fg=C_MUTED).pack(side="left")
+        tk.Spinbox(row, from_=5, to=300, textvariable=self._v_watch_interval, width=5,
+                   font=FONT_NORMAL, bg=C_INPUT, fg=C_TEXT, relief="flat",
+                   buttonbackground=C_CARD).pack(side="left", padx=(10, 0), ipady=3)
+
+        if self.sumatra_path:
+            txt, color = f"SumatraPDF: {Path(self.sumatra_path).name}", C_SUCCESS
+        elif self.acrobat_path:
             txt, color = f"Adobe Acrobat: {Path(self.acrobat_path).name}", C_SUCCESS
         else:
             txt, color = "Adobe Acrobat NO encontrado", C_DANGER
-        tk.Label(parent, text=txt, font=("Segoe UI", 8),
+        tk.Label(parent, text=txt, font=FONT_SMALL,
                  bg=C_SURFACE, fg=color).pack(anchor="w", pady=(7, 0))
 
     def _sec_system(self, parent):
         tk.Checkbutton(parent, text="Iniciar automaticamente con Windows",
-                       variable=self._v_autostart, font=("Segoe UI", 10),
+                       variable=self._v_autostart, font=FONT_NORMAL,
                        bg=C_SURFACE, fg=C_TEXT, selectcolor=C_BG,
                        activebackground=C_SURFACE, activeforeground=C_TEXT,
                        command=self._toggle_autostart).pack(side="left")
@@ -1915,11 +3184,27 @@ class AutoPrintApp:
     # ------------------------------------------------------------------
 
     def _open_history(self):
+        """
+        Muestra el historial. La ventana se construye la primera vez y luego
+        solo se oculta y se vuelve a mostrar, actualizando contadores y texto.
+        """
+        win = self._history_win
+        if win is None or not win.winfo_exists():
+            win = self._build_history_window()
+        today_lbl, total_lbl = self._history_labels
+        today_lbl.config(text=str(self.config["printed_today"]))
+        total_lbl.config(text=str(self.config["printed_total"]))
+        self._load_history_text()
+        win.deiconify()
+        win.lift()
+
+    def _build_history_window(self):
         win = tk.Toplevel(self.root)
         win.title("Historial de impresiones")
         win.geometry("640x420")
         win.configure(bg=C_BG)
         win.transient(self.root)
+        win.protocol("WM_DELETE_WINDOW", win.withdraw)
 
         tk.Label(win, text="Historial de impresiones",
                  font=("Segoe UI", 12, "bold"),
@@ -1927,47 +3212,27 @@ class AutoPrintApp:
 
         stats = tk.Frame(win, bg=C_SURFACE, padx=14, pady=10)
         stats.pack(fill="x", padx=16, pady=(0, 10))
-        for label, value, color in [
-            ("Impresos hoy",  self.config["printed_today"], C_SUCCESS),
-            ("Total impreso", self.config["printed_total"], C_TEXT),
-        ]:
+        labels = []
+        for label, color in [("Impresos hoy", C_SUCCESS), ("Total impreso", C_TEXT)]:
             col = tk.Frame(stats, bg=C_SURFACE)
             col.pack(side="left", padx=(0, 30))
-            tk.Label(col, text=str(value), font=("Segoe UI", 24, "bold"),
-                     bg=C_SURFACE, fg=color).pack()
-            tk.Label(col, text=label, font=("Segoe UI", 8),
+            value_lbl = tk.Label(col, font=("Segoe UI", 24, "bold"),
+                                 bg=C_SURFACE, fg=color)
+            value_lbl.pack()
+            tk.Label(col, text=label, font=FONT_SMALL,
                      bg=C_SURFACE, fg=C_MUTED).pack()
+            labels.append(value_lbl)
 
         txt_frame = tk.Frame(win, bg=C_BG)
         txt_frame.pack(fill="both", expand=True, padx=16, pady=(0, 10))
         sb = tk.Scrollbar(txt_frame)
         sb.pack(side="right", fill="y")
-        txt = tk.Text(txt_frame, font=("Consolas", 9),
+        txt = tk.Text(txt_frame, font=FONT_MONO,
                       bg="#0a0a1a", fg=C_MUTED, relief="flat",
                       state="disabled", yscrollcommand=sb.set)
         txt.pack(fill="both", expand=True)
         sb.config(command=txt.yview)
 
-        try:
-            if HISTORY_FILE.exists():
-                with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                txt.config(state="normal")
-                txt.insert("end", f"{'FECHA':<22} {'ARCHIVO':<35} {'IMPRESORA':<25} ESTADO\n")
-                txt.insert("end", "-" * 95 + "\n")
-                for line in reversed(lines[-200:]):
-                    txt.insert("end", line)
-                txt.config(state="disabled")
-            else:
-                txt.config(state="normal")
-                txt.insert("end", "Sin historial todavia.")
-                txt.config(state="disabled")
-        except Exception:
-            pass
-
-        btn_row = tk.Frame(win, bg=C_BG)
-        btn_row.pack(fill="x", padx=16, pady=(0, 12))
-
         def reset_counters():
             if messagebox.askyesno("Reiniciar contadores",
                                    "Reiniciar contadores de hoy y total a cero?",
@@ -1975,21 +3240,58 @@ class AutoPrintApp:
                 self.config["printed_today"] = 0
                 self.config["printed_total"] = 0
                 self._update_counter_ui()
-                win.destroy()
-
-        tk.Button(btn_row, text="Reiniciar contadores",
-                  font=("Segoe UI", 9), bg="#7f1d1d", fg="white",
-                  relief="flat", cursor="hand2", padx=10, pady=6,
-                  command=reset_counters).pack(side="left")
-        tk.Button(btn_row, text="Cerrar",
-                  font=("Segoe UI", 9), bg=C_CARD, fg=C_TEXT,
-                  relief="flat", cursor="hand2", padx=10, pady=6,
-                  command=win.destroy).pack(side="right")
+                win.withdraw()
+
+        self._make_button_row(win, C_BG, [
+            ("Reiniciar contadores", reset_counters, {"bg": "#7f1d1d", "fg": "white"}),
+            ("Cerrar",               win.withdraw,   {"side": "right"}),
+        ], font=FONT_BODY, bg=C_CARD, fg=C_TEXT, padx=10, pady=6
+        ).pack(fill="x", padx=16, pady=(0, 12))
+
+        self._history_win    = win
+        self._history_labels = labels
+        self._history_txt    = txt
+        return win
+
+    def _load_history_text(self):
+        txt = self._history_txt
+        self._history.flush()
+        try:
+            if HISTORY_FILE.exists():
+                with open(HISTORY_FILE, "r", encoding="utf-8") as f:
+                    lines = collections.deque(f, maxlen=200)
+                header = f"{'FECHA':<22} {'ARCHIVO':<35} {'IMPRESORA':<25} ESTADO\n"
+                body   = header + "-" * 95 + "\n" + "".join(reversed(lines))
+            else:
+                body = "Sin historial todavia."
+            # Un solo insert con todo el bloque en vez de uno por linea
+            txt.config(state="normal")
+            txt.delete("1.0", "end")
+            txt.insert("end", body)
+            txt.config(state="disabled")
+        except Exception:
+            pass
 
     # ------------------------------------------------------------------
     # Helpers UI
     # ------------------------------------------------------------------
 
+    def _make_button_row(self, parent, bg, specs, **common):
+        """
+        Fila de botones planos con estilo compartido.
+        specs = [(texto, comando, opciones), ...]; "side" y "gap" de las
+        opciones van al pack (lado y padx), el resto se aplica al boton
+        encima de `common`. Devuelve el frame sin empaquetar.
+        """
+        row = tk.Frame(parent, bg=bg)
+        for text, command, opts in specs:
+            opts = dict(common, **opts)
+            side = opts.pop("side", "left")
+            gap  = opts.pop("gap", 0)
+            tk.Button(row, text=text, command=command,
+                      relief="flat", cursor="hand2", **opts).pack(side=side, padx=gap)
+        return row
+
     def _hide_window(self):
         if self.root:
             self.root.withdraw()
@@ -2016,9 +3318,12 @@ class AutoPrintApp:
         )
         if not path:
             return
+        # Copia primero: _log agrega al deque desde otros hilos y recorrerlo
+        # vivo puede dar "deque mutated during iteration"
+        entries = list(self._log_entries)
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write("\n".join(self._log_entries))
+            with open(path, "w", encoding="utf-8", buffering=1 << 16) as f:
+                f.writelines(e + "\n" for e in entries)
             self._log(f"Log exportado: {path}")
         except Exception as e:
             messagebox.showerror("Error", str(e), parent=self.root)
@@ -2026,6 +3331,18 @@ class AutoPrintApp:
     def _refresh_status_ui(self):
         if not self.root:
             return
+        if self._last_watching_state != self.is_watching:
+            self._last_watching_state = self.is_watching
+            self._apply_status_state()
+        self._update_counter_ui()
+        if self.widget:
+            try:
+                self.widget.win.after(0, self.widget.refresh)
+            except Exception:
+                pass
+
+    def _apply_status_state(self):
+        """Etiqueta, boton y logo segun is_watching (solo cuando cambia)."""
         if self.is_watching:
             if self._status_lbl:
                 self._status_lbl.config(text="Activo", fg=C_SUCCESS)
@@ -2037,64 +3354,111 @@ class AutoPrintApp:
             if self._toggle_btn:
                 self._toggle_btn.config(text="Iniciar", bg=C_SUCCESS)
         try:
-            if self._logo_lbl and self._logo_photo:
-                new_img = self._make_icon(self.is_watching).resize((48, 48), Image.LANCZOS)
-                self._logo_photo.paste(new_img)
-                self._logo_lbl.config(image=self._logo_photo)
+            if self._logo_lbl:
+                self._logo_lbl.config(image=self._logo_for(self.is_watching))
         except Exception:
             pass
-        self._update_counter_ui()
-        if self.widget:
-            try:
-                self.widget.win.after(0, self.widget.refresh)
-            except Exception:
-                pass
+
+    # Un grupo por etiqueta, en orden de prioridad (gana el grupo mas bajo)
+    _LOG_TAG_RE   = re.compile(r"(error)|(aviso)|(ok|impreso)|(copiado|archivado|eliminado)"
+                               r"|(detectado|enviando)|(iniciado|vigilando)|(detenido)", re.I)
+    _LOG_TAG_NAME = (None, "error", "warn", "ok", "archive", "detect", "start", "stop")
 
     def _log_tag_for(self, entry):
-        low = entry.lower()
-        if "error" in low:                                      return "error"
-        if "aviso" in low:                                      return "warn"
-        if "ok" in low or "impreso" in low:                     return "ok"
-        if "copiado" in low or "archivado" in low or "eliminado" in low: return "archive"
-        if "detectado" in low or "enviando" in low:             return "detect"
-        if "iniciado" in low or "vigilando" in low:             return "start"
-        if "detenido" in low:                                   return "stop"
-        if entry.strip().startswith("─"):                       return "sep"
+        best = min((m.lastindex for m in self._LOG_TAG_RE.finditer(entry)), default=0)
+        if best:
+            return self._LOG_TAG_NAME[best]
+        if entry[:1] == "─":
+            return "sep"
         return "info"
 
-    def _append_log_widget(self, entry):
-        if not self._log_widget:
+    _LOG_MAX_LINES = 300   # lineas maximas visibles en el Text del registro
+
+    def _append_log_widget(self, entries):
+        """Inserta varias lineas de una vez: un insert por racha de lineas con
+        la misma etiqueta y un solo see("end")."""
+        if not self._log_widget or not entries:
             return
         try:
-            self._log_widget.config(state="normal")
-            tag = self._log_tag_for(entry)
-            self._log_widget.insert("end", entry + "\n", tag)
-            self._log_widget.see("end")
-            self._log_widget.config(state="disabled")
+            w = self._log_widget
+            w.config(state="normal")
+            group, group_tag = [], None
+            for entry in entries:
+                tag = self._log_tag_for(entry)
+                if tag != group_tag and group:
+                    w.insert("end", "\n".join(group) + "\n", group_tag)
+                    group = []
+                group.append(entry)
+                group_tag = tag
+            if group:
+                w.insert("end", "\n".join(group) + "\n", group_tag)
+            # Recortar por arriba: un Text muy largo hace lento cada insert
+            n = int(w.index("end-1c").split(".")[0])
+            if n > self._LOG_MAX_LINES:
+                w.delete("1.0", f"{n - self._LOG_MAX_LINES + 1}.0")
+            w.see("end")
+            w.config(state="disabled")
         except Exception:
             pass
 
+    _LOG_FLUSH_MS = 50   # las lineas que llegan en este intervalo se pintan juntas
+
+    def _flush_log_buffer(self):
+        # Bajar la bandera antes de vaciar: una linea que llegue durante el
+        # vaciado, o entra en este lote, o programa el siguiente
+        self._log_flush_pending = False
+        buf     = self._log_buffer
+        entries = []
+        while buf:
+            entries.append(buf.popleft())
+        self._append_log_widget(entries)
+
     # ------------------------------------------------------------------
     # Log
     # ------------------------------------------------------------------
 
     def _log(self, msg):
-        ts    = time.strftime("%H:%M:%S")
-        entry = f"[{ts}] {msg}"
+        # strftime una vez por segundo: en una racha de lineas se reutiliza
+        t = int(time.time())
+        if t != self._ts_cache[0]:
+            self._ts_cache = (t, time.strftime("%H:%M:%S", time.localtime(t)))
+        entry = f"[{self._ts_cache[1]}] {msg}"
         self._log_entries.append(entry)
-        if len(self._log_entries) > 300:
-            self._log_entries = self._log_entries[-300:]
-        print(entry)
+        if _HAS_STDOUT:
+            print(entry)
         if self.root:
-            self.root.after(0, self._append_log_widget, entry)
+            self._log_buffer.append(entry)
+            if not self._log_flush_pending:
+                self._log_flush_pending = True
+                self.root.after(self._LOG_FLUSH_MS, self._flush_log_buffer)
 
     # ------------------------------------------------------------------
     # Monitoreo multi-carpeta
     # ------------------------------------------------------------------
 
+    def _on_config_var(self, *_):
+        """Trace de los spinbox de espera/sondeo: solo esos valores, sin
+        refrescar el estado, y una sola escritura 300 ms despues del ultimo cambio."""
+        if self._config_save_after is not None:
+            self.root.after_cancel(self._config_save_after)
+        self._config_save_after = self.root.after(300, self._save_from_ui)
+
     def _save_from_ui(self):
-        if self._v_wait:       self.config["wait_seconds"] = self._v_wait.get()
-        if self._v_autostart:  self.config["autostart"]    = self._v_autostart.get()
+        if self._config_save_after is not None:
+            self.root.after_cancel(self._config_save_after)
+            self._config_save_after = None
+        values = {}
+        if self._v_wait:
+            try:
+                values["wait_seconds"] = max(1, int(self._v_wait.get()))
+            except (ValueError, tk.TclError):
+                pass   # campo vacio a medio escribir
+        if self._v_watch_interval:
+            try:
+                values["watch_interval"] = max(5, int(self._v_watch_interval.get()))
+            except (ValueError, tk.TclError):
+                pass
+        self.config.update(values)   # una escritura como mucho, ninguna si nada cambio
 
     def _toggle_ui(self):
         self._save_from_ui()
@@ -2112,31 +3476,46 @@ class AutoPrintApp:
         if not rules:
             self._show_error("No hay reglas configuradas.\nAgrega al menos una regla.")
             return False
-        if not self.acrobat_path:
+        if not self.acrobat_path and not self.sumatra_path:
             self._show_error("Adobe Acrobat Reader no encontrado.")
             return False
 
-        started = 0
+        # Un solo Observer nativo para todas las reglas en discos locales:
+        # watchdog comparte el mismo emisor (ReadDirectoryChangesW) entre
+        # reglas que vigilan la misma carpeta y usa un unico hilo despachador.
+        # Las carpetas de red/extraibles van a un observer de sondeo aparte.
+        obs      = Observer()
+        poll_obs = None
+        drives   = {}              # raiz de unidad -> es disco local
+        started  = 0
+        # valores globales leidos una vez, no en cada regla
+        acrobat  = self.acrobat_path
+        wait     = self.config["wait_seconds"]
+        interval = self.config["watch_interval"]
+        existing = self._existing_dirs_cached(
+            [r.get("folder", "") for r in rules if r.get("folder")] +
+            [r.get("archive_folder", "") for r in rules
+             if r.get("archive_enabled") and r.get("archive_folder")])
         for rule in rules:
             folder  = rule.get("folder", "")
             printer = rule.get("printer", "")
             if not folder or not printer:
                 continue
-            if not os.path.exists(folder):
+            if folder not in existing:
                 self._log(f"AVISO: carpeta no existe, regla omitida: {folder}")
                 continue
 
             archive_enabled = rule.get("archive_enabled", False)
             archive_folder  = rule.get("archive_folder", "")
-            if archive_enabled and archive_folder and not os.path.exists(archive_folder):
+            if archive_enabled and archive_folder and archive_folder not in existing:
                 self._log(f"AVISO: carpeta de archivo no existe, archivo desactivado: {archive_folder}")
                 archive_enabled = False
 
-            rule_name = rule.get("name") or folder.split("/")[-1].split("\\")[-1]
+            rule_name = rule.get("name") or os.path.basename(folder.rstrip("/\\")) or folder
             handler = PDFHandler(
                 printer         = printer,
-                acrobat_path    = self.acrobat_path,
-                wait_seconds    = self.config["wait_seconds"],
+                acrobat_path    = acrobat,
+                wait_seconds    = wait,
                 log_fn          = self._log,
                 archive_enabled = archive_enabled,
                 archive_folder  = archive_folder,
@@ -2146,18 +3525,36 @@ class AutoPrintApp:
                 print_queue     = self._print_queue,
                 schedule_fn     = self._is_in_schedule,
                 on_pending_fn   = self._add_pending_job,
+                dispatcher      = self._settle,
+                seen_fn         = self._seen_recently,
+                archive_queue   = self._archive_queue,
             )
-            obs = Observer()
-            obs.schedule(handler, folder, recursive=False)
-            obs.start()
-            self._observers.append(obs)
-            self._log(f"[{rule_name}] Vigilando: {folder} -> {printer}")
+            drive = os.path.splitdrive(os.path.abspath(folder))[0].lower()
+            if drive not in drives:
+                drives[drive] = _is_fixed_drive(folder)
+            if drives[drive]:
+                obs.schedule(handler, folder, recursive=False)
+                self._log(f"[{rule_name}] Vigilando: {folder} -> {printer}")
+            else:
+                if poll_obs is None:
+                    from watchdog.observers.polling import PollingObserverVFS
+                    poll_obs = PollingObserverVFS(
+                        stat=os.stat, listdir=_pdf_listdir,
+                        polling_interval=interval)
+                poll_obs.schedule(handler, folder, recursive=False)
+                # Sin notificaciones del sistema: un PDF tarda hasta un intervalo en verse
+                self._log(f"[{rule_name}] Vigilando (red, sondeo cada "
+                          f"{interval}s): {folder} -> {printer}")
             started += 1
 
         if started == 0:
             self._show_error("Ninguna regla valida para iniciar.")
             return False
 
+        self._observers = [o for o in (obs, poll_obs) if o is not None and o.emitters]
+        for o in self._observers:
+            o.start()
+
         self.is_watching      = True
         self.config["active"] = True
         self._touch_last_seen()   # marcar ahora como "ultima vez activo"
@@ -2165,20 +3562,59 @@ class AutoPrintApp:
         self._update_tray_icon()
         return True
 
+    _OBS_JOIN_TIMEOUT = 2.0   # segundos max que _stop_watching espera a cada observer
+
     def _stop_watching(self):
-        for obs in self._observers:
+        observers, self._observers = self._observers, []
+        for obs in observers:
             try:
                 obs.stop()
-                obs.join()
             except Exception:
                 pass
-        self._observers.clear()
+        # join acotado: un sondeo de red lento no debe congelar la UI; lo que
+        # quede vivo se espera en segundo plano
+        lingering = []
+        for obs in observers:
+            try:
+                obs.join(timeout=self._OBS_JOIN_TIMEOUT)
+                if obs.is_alive():
+                    lingering.append(obs)
+            except Exception:
+                pass
+        if lingering:
+            self._log("Esperando a que termine la vigilancia en curso...")
+            threading.Thread(target=lambda: [o.join() for o in lingering],
+                             daemon=True, name="ObserverJoin").start()
         self.is_watching      = False
         self.config["active"] = False
         self._touch_last_seen()   # guardar "la ultima vez activo" para el escaneo de arranque
         self._log(f"─── Sesion detenida  {time.strftime('%H:%M:%S')} ───")
         self._update_tray_icon()
 
+    _DIR_TTL = 2.0   # segundos que se confia en que una carpeta existe / no existe
+
+    def _existing_dirs_cached(self, paths):
+        """
+        _existing_dirs con una cache corta: detener y reanudar la vigilancia
+        seguido no vuelve a consultar carpetas de red que se acaban de
+        comprobar. Se vacia al editar las reglas (_config_dirty).
+        """
+        now, cache = time.monotonic(), self._dir_cache
+        found, misses = set(), []
+        for p in set(paths):
+            hit = cache.get(p)
+            if hit is not None and now - hit[0] < self._DIR_TTL:
+                if hit[1]:
+                    found.add(p)
+            else:
+                misses.append(p)
+        if misses:
+            fresh = _existing_dirs(misses)
+            for p in misses:
+                cache[p] = (now, p in fresh)
+            found |= fresh
+        return found
+
     def _show_error(self, msg):
         if self.root and self.root.winfo_exists():
             messagebox.showerror("AutoPrint", msg, parent=self.root)
@@ -2196,23 +3632,55 @@ class AutoPrintApp:
                 "No se pudo modificar el inicio automatico.\n"
                 "Intenta como administrador.", parent=self.root)
             self._v_autostart.set(not enabled)
-        else:
-            self.config["autostart"] = enabled
+
+    def _read_autostart(self):
+        """Comando actual en la clave Run: "" si no hay entrada, None si no se
+        pudo leer."""
+        try:
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, STARTUP_KEY, 0,
+                                winreg.KEY_QUERY_VALUE) as key:
+                return winreg.QueryValueEx(key, APP_NAME)[0]
+        except FileNotFoundError:
+            return ""
+        except Exception:
+            return None
+
+    def _sync_autostart(self):
+        """Lee la clave Run al arrancar y alinea config["autostart"] con ella.
+        Despues la UI solo consulta la config."""
+        cmd = self._read_autostart()
+        if cmd is None:
+            return
+        actual = bool(cmd)
+        # Solo se migra la entrada de una version anterior de ESTE ejecutable
+        # (mismo comando sin --tray). Una entrada de otra ruta (p. ej. el exe
+        # instalado mientras se corre desde el codigo fuente) no se toca
+        legacy = self._autostart_cmd[:-len(" --tray")]
+        if actual and cmd.lower() == legacy.lower():
+            self._set_autostart(True)
+        if self.config["autostart"] != actual:
+            self.config["autostart"] = actual
 
     def _set_autostart(self, enable):
+        """Unico punto de escritura: registro + config. No toca el registro
+        si ya tiene el valor pedido; se relee en cada llamada porque la
+        entrada puede cambiar fuera de la app mientras corre."""
+        target = self._autostart_cmd if enable else ""
+        if self._read_autostart() == target:
+            self.config["autostart"] = enable
+            return True
         try:
-            key = winreg.OpenKey(winreg.HKEY_CURRENT_USER, STARTUP_KEY, 0,
-                                 winreg.KEY_SET_VALUE)
-            if enable:
-                cmd = (f'"{sys.executable}"' if getattr(sys, "frozen", False)
-                       else f'"{sys.executable}" "{os.path.abspath(__file__)}"')
-                winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ, cmd)
-            else:
-                try:
-                    winreg.DeleteValue(key, APP_NAME)
-                except FileNotFoundError:
-                    pass
-            winreg.CloseKey(key)
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, STARTUP_KEY, 0,
+                                winreg.KEY_SET_VALUE) as key:
+                if enable:
+                    winreg.SetValueEx(key, APP_NAME, 0, winreg.REG_SZ,
+                                      self._autostart_cmd)
+                else:
+                    try:
+                        winreg.DeleteValue(key, APP_NAME)
+                    except FileNotFoundError:
+                        pass
+            self.config["autostart"] = enable
             return True
         except Exception as e:
             print(f"Error autostart: {e}")
@@ -2230,42 +3698,103 @@ class AutoPrintApp:
             self._quit_app()
 
     def _quit_app(self, icon=None, item=None):
+        # Se puede llamar desde el hilo de la bandeja y desde Tk a la vez:
+        # solo el primero ejecuta el cierre
+        with self._quit_lock:
+            if self._quitting:
+                return
+            self._quitting = True
         self._monitor_running = False
+        self._sched_event.set()
         self._stop_watching()
+        self._settle.stop()
+        self._flush_executor.stop()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._print_queue.stop()
+        self.config.flush()
+        self._history.flush()
         if self.tray_icon:
             self.tray_icon.stop()
         if self.root:
             self.root.after(0, self._do_quit)
 
     def _do_quit(self):
+        # Sin destroy() ni sys.exit(): recorrer el arbol de widgets y los
+        # finalizadores no aporta nada al salir. _quit_app ya guardo config,
+        # historial y pendientes; el lock de instancia lo libera el sistema
         try:
-            self.root.destroy()
+            self.root.quit()
         except Exception:
             pass
-        sys.exit(0)
+        os._exit(0)
 
     # ------------------------------------------------------------------
     # Inicio
     # ------------------------------------------------------------------
 
+    def _acquire_instance_lock(self):
+        """
+        Instancia unica: abre LOCK_FILE sin compartir y con borrado al cerrar.
+        Si otra instancia lo tiene abierto falla con violacion de comparticion.
+        El handle se guarda en self y el sistema lo cierra (y borra el archivo)
+        al terminar el proceso, aunque sea por un cierre abrupto.
+        """
+        h = _k32.CreateFileW(str(LOCK_FILE), _GENERIC_WRITE, 0, None, _CREATE_ALWAYS,
+                             _FILE_ATTRIBUTE_HIDDEN | _FILE_FLAG_DELETE_ON_CLOSE, None)
+        if h is None or h == _INVALID_HANDLE_VALUE:
+            # Cualquier otro fallo (permisos, AppData raro) no impide arrancar
+            return ctypes.get_last_error() != _ERROR_SHARING_VIOLATION
+        self._instance_lock = h
+        return True
+
+    _SW_RESTORE = 9
+
+    def _focus_running_instance(self):
+        """
+        Trae al frente la ventana de la instancia que ya corre, si esta a la
+        vista (aunque minimizada). Una ventana oculta en la bandeja no se toca:
+        mostrarla desde fuera de Tk desincronizaria su estado.
+        """
+        try:
+            u32  = ctypes.windll.user32
+            hwnd = u32.FindWindowW(None, WINDOW_TITLE)
+            if not hwnd or not u32.IsWindowVisible(hwnd):
+                return False
+            if u32.IsIconic(hwnd):
+                u32.ShowWindow(hwnd, self._SW_RESTORE)
+            u32.SetForegroundWindow(hwnd)
+            return True
+        except Exception:
+            return False
+
     def run(self):
-        import ctypes
-        mutex = ctypes.windll.kernel32.CreateMutexW(None, False, "AutoPrintAppMutex_v1")
-        if ctypes.windll.kernel32.GetLastError() == 183:
-            messagebox.showinfo(APP_NAME,
-                "AutoPrint ya esta en ejecucion.\nRevisa el icono en la bandeja del sistema.")
+        if not self._acquire_instance_lock():
+            if not self._focus_running_instance():
+                messagebox.showinfo(APP_NAME,
+                    "AutoPrint ya esta en ejecucion.\nRevisa el icono en la bandeja del sistema.")
             sys.exit(0)
 
+        threading.Thread(target=_preload_modules, daemon=True, name="Preload").start()
         self._setup_tray()
 
         if self.config["active"] and self.config["rules"]:
             self._start_watching()
 
-        # Iniciar tray PRIMERO para que las notificaciones de arranque lleguen
-        threading.Thread(target=self.tray_icon.run, daemon=True, name="TrayThread").start()
-        time.sleep(0.8)  # dar tiempo al tray para registrarse en el sistema
+        # Iniciar tray PRIMERO para que las notificaciones de arranque lleguen:
+        # pystray llama a setup en cuanto el icono existe; con setup propio
+        # hay que hacerlo visible a mano
+        def _on_tray_ready(icon):
+            icon.visible = True
+            self._tray_ready.set()
+
+        def _tray_main():
+            _lower_thread_priority()
+            self.tray_icon.run(setup=_on_tray_ready)
+
+        threading.Thread(target=_tray_main, daemon=True, name="TrayThread").start()
+        self._tray_ready.wait(timeout=3.0)
 
-        # Hilo monitor de horario
+        # Monitor de horario
         self._monitor_running = True
         threading.Thread(target=self._schedule_monitor, daemon=True,
                          name="ScheduleMonitor").start()
@@ -2277,7 +3806,7 @@ class AutoPrintApp:
         threading.Thread(target=self._scan_missed_files, daemon=True,
                          name="StartupScan").start()
 
-        self._build_window()
+        self._build_window(show="--tray" not in sys.argv[1:])
         self.root.mainloop()
 
 